@@ -8,19 +8,19 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 
 # stdlib
 import logging
-from traceback import format_exc
 
 # Bunch
 from bunch import Bunch
 
 # gevent
-from gevent import spawn
+from gevent.pool import Pool
 
 # orjson
-from orjson import dumps
+from orjson import dumps, OPT_NON_STR_KEYS
 
 # Requests
-from requests import post as requests_post
+from requests import Session as RequestsSession
+from requests.adapters import HTTPAdapter
 
 # Zato
 from zato.common.broker_message import code_to_name, SCHEDULER
@@ -45,20 +45,30 @@ has_debug = False
 
 use_tls = is_non_windows
 
+# How many connections to the scheduler to keep open at most
+scheduler_pool_maxsize = 64
+
+# How many messages can be processed concurrently by default
+default_broker_pool_size = 256
+
+# Messages to the scheduler are serialized with these options and headers
+scheduler_dumps_options = OPT_NON_STR_KEYS
+scheduler_headers = {'Content-Type': 'application/json'}
+
 # ################################################################################################################################
 # ################################################################################################################################
 
-to_scheduler_actions = {
+to_scheduler_actions = frozenset({
     SCHEDULER.CREATE.value,
     SCHEDULER.EDIT.value,
     SCHEDULER.DELETE.value,
     SCHEDULER.EXECUTE.value,
-}
+})
 
-from_scheduler_actions = {
+from_scheduler_actions = frozenset({
     SCHEDULER.JOB_EXECUTED.value,
     SCHEDULER.DELETE.value,
-}
+})
 
 # ################################################################################################################################
 # ################################################################################################################################
@@ -74,6 +84,11 @@ class BrokerClient:
 
         self.zato_client = None # type: AnyServiceInvoker
         self.scheduler_url = ''
+        self.scheduler_session = None # type: RequestsSession
+
+        # All messages are processed by greenlets from this pool, which caps how many of them can run concurrently
+        broker_pool_size = (scheduler_config or {}).get('broker_pool_size') or default_broker_pool_size
+        self.pool = Pool(size=int(broker_pool_size))
 
         # We are a server so we will have configuration needed to set up the scheduler's details ..
         if scheduler_config:
@@ -87,6 +102,12 @@ class BrokerClient:
                 scheduler_config.scheduler_port,
             )
 
+            # Connections to the scheduler are kept alive across messages instead of being established for each one
+            adapter = HTTPAdapter(pool_maxsize=scheduler_pool_maxsize)
+            self.scheduler_session = RequestsSession()
+            self.scheduler_session.mount('http://', adapter)
+            self.scheduler_session.mount('https://', adapter)
+
         # .. otherwise, we are a scheduler so we have a client to invoke servers with.
         else:
             self.zato_client = zato_client
@@ -101,8 +122,8 @@ class BrokerClient:
 
     def _invoke_scheduler_from_server(self, msg):
         # type: (dict) -> None
-        msg = dumps(msg)
-        requests_post(self.scheduler_url, msg, verify=False)
+        msg = dumps(msg, default=str, option=scheduler_dumps_options)
+        self.scheduler_session.post(self.scheduler_url, msg, headers=scheduler_headers, verify=False)
 
 # ################################################################################################################################
 
@@ -112,7 +133,7 @@ class BrokerClient:
 
 # ################################################################################################################################
 
-    def _rpc_invoke(self, msg, from_scheduler=False):
+    def _rpc_invoke(self, msg, from_scheduler=False, _get_code_name=code_to_name.__getitem__):
 
         # Local aliases ..
         from_server = not from_scheduler
@@ -131,25 +152,25 @@ class BrokerClient:
                 return
 
             # .. otherwise, we invoke servers.
-            code_name = code_to_name[action]
+            code_name = _get_code_name(action)
             if has_debug:
                 logger.info('Invoking %s %s', code_name, msg)
 
             self.server_rpc.invoke_all('zato.service.rpc-service-invoker', msg, ping_timeout=10)
 
         except Exception:
-            logger.warning(format_exc())
+            logger.warning('Could not invoke broker message `%s`', action, exc_info=True)
 
 # ################################################################################################################################
 
     def publish(self, msg:'anydict', *ignored_args:'any_', **kwargs:'any_') -> 'None':
-        spawn(self._rpc_invoke, msg, **kwargs)
+        self.pool.spawn(self._rpc_invoke, msg, **kwargs)
 
 # ################################################################################################################################
 
     def invoke_async(self, msg, *ignored_args, **kwargs):
         # type: (dict, object, object) -> None
-        spawn(self._rpc_invoke, msg, **kwargs)
+        self.pool.spawn(self._rpc_invoke, msg, **kwargs)
 
 # ################################################################################################################################
 
@@ -149,6 +149,7 @@ command_imports = (
     ('reset_totp_key', 'zato.cli.web_admin_auth.ResetTOTPKey'),
     ('quickstart_create', 'zato.cli.quickstart.Create'),
     ('service_invoke', 'zato.cli.service.Invoke'),
+    ('service_invoke_daemon', 'zato.cli.service.InvokeDaemon'),
     ('set_ide_password', 'zato.cli.ide.SetIDEPassword'),
     ('set_admin_invoke_password', 'zato.cli.web_admin_auth.SetAdminInvokePassword'),
     ('sso_change_user_password', 'zato.cli.sso.ChangeUserPassword'),
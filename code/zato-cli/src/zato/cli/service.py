@@ -42,13 +42,21 @@ class Invoke(ZatoCommand):
 
 # ################################################################################################################################
 
-    def execute(self, args):
+    def get_client(self, args):
 
         # Zato
-        from zato.common.api import DATA_FORMAT
         from zato.common.util.api import get_client_from_server_conf
 
-        client = get_client_from_server_conf(args.path, stdin_data=self.stdin_data)
+        return get_client_from_server_conf(args.path, stdin_data=self.stdin_data)
+
+# ################################################################################################################################
+
+    def invoke_service(self, client, args, name, payload):
+        """ Invokes a service by its name with a given payload, taking all the other options from args.
+        """
+
+        # Zato
+        from zato.common.api import DATA_FORMAT
 
         headers = {}
         if args.headers:
@@ -60,15 +68,85 @@ class Invoke(ZatoCommand):
         to_json = True if args.data_format == DATA_FORMAT.JSON else False
 
         func = client.invoke_async if args.is_async else client.invoke
-        response = func(args.name, args.payload, headers, args.channel, args.data_format, args.transport, to_json=to_json)
+        return func(name, payload, headers, args.channel, args.data_format, args.transport, to_json=to_json)
+
+# ################################################################################################################################
+
+    def get_output(self, response):
+        """ Returns what the command prints out for a given response.
+        """
+        return (response.data or '(None)') if response.ok else response.details
+
+# ################################################################################################################################
+
+    def execute(self, args):
+
+        client = self.get_client(args)
+        response = self.invoke_service(client, args, args.name, args.payload)
 
         if response.ok:
-            self.logger.info(response.data or '(None)')
+            self.logger.info(self.get_output(response))
         else:
-            self.logger.error(response.details)
+            self.logger.error(self.get_output(response))
 
         if args.verbose:
             self.logger.debug('inner.text:[{}]'.format(response.inner.text))
             self.logger.debug('response:[{}]'.format(response))
 
 # ################################################################################################################################
+# ################################################################################################################################
+
+class InvokeDaemon(Invoke):
+    """ Invokes services by their names, reading one JSON request per line from stdin and writing one JSON reply per line to stdout
+    """
+    opts = [opt for opt in Invoke.opts if opt['name'] not in ('name', '--payload')]
+
+    # Written to stdout once the daemon is ready to read requests
+    ready_marker = '{"is_ready": true}'
+
+# ################################################################################################################################
+
+    def _write_reply(self, stdout, exit_code):
+
+        # stdlib
+        import sys
+        from json import dumps
+
+        sys.stdout.write(dumps({'stdout': stdout, 'exit_code': exit_code}))
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+# ################################################################################################################################
+
+    def execute(self, args):
+
+        # stdlib
+        import sys
+        from json import loads
+        from traceback import format_exc
+
+        # The client is created once and reused by all the requests that follow
+        client = self.get_client(args)
+
+        sys.stdout.write(self.ready_marker)
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+
+        # Each request is a dict with the name of a service to invoke and, optionally,
+        # its payload serialized to JSON. We run until stdin is closed by our caller.
+        for line in sys.stdin:
+
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = loads(line)
+                response = self.invoke_service(client, args, request['service'], request.get('payload'))
+            except Exception:
+                self._write_reply(format_exc(), self.SYS_ERROR.EXCEPTION_CAUGHT)
+            else:
+                # This is the same output that the 'zato service invoke' command writes
+                self._write_reply('{}\n'.format(self.get_output(response)), 0)
+
+# ################################################################################################################################
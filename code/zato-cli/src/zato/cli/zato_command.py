@@ -400,6 +400,11 @@ class CommandStore:
         service_invoke.set_defaults(command='service_invoke')
         self.add_opts(service_invoke, service_mod.Invoke.opts)
 
+        service_invoke_daemon = service_subs.add_parser(
+            'invoke-daemon', description=service_mod.InvokeDaemon.__doc__, parents=[base_parser])
+        service_invoke_daemon.set_defaults(command='service_invoke_daemon')
+        self.add_opts(service_invoke_daemon, service_mod.InvokeDaemon.opts)
+
         #
         # sso
         #
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (C) 2022, Zato Source s.r.o. https://zato.io
+
+Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
+"""
+
+# stdlib
+import logging
+import os
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from json import dumps, loads
+from unittest import main, TestCase
+
+# Bunch
+from bunch import Bunch
+
+# mock
+from mock import patch
+
+# sh
+import sh
+
+# Zato
+from zato.cli.service import Invoke, InvokeDaemon
+from zato.common.test import rand_string
+from zato.common.util.cli import CommandLineServiceInvoker
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+# Invoking this service makes the command exit with the code below
+exit_service = 'test.exit'
+exit_code = 3
+
+# Invoking this one makes the command exit with a message rather than a code
+exit_message_service = 'test.exit-message'
+
+# This one raises an exception
+exception_service = 'test.exception'
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class FakeInvoke(Invoke):
+    """ Responds with the name of the service and its payload instead of invoking a server.
+    """
+    # There is no server directory with its files
+    file_needed = None
+
+    def get_client(self, args):
+        return None
+
+    def invoke_service(self, client, args, name, payload):
+
+        if name == exit_service:
+            self.logger.error('Exiting')
+            sys.exit(exit_code)
+
+        elif name == exit_message_service:
+            sys.exit('Exiting')
+
+        elif name == exception_service:
+            raise Exception('Invocation error')
+
+        return Bunch(ok=True, data='{}:{}'.format(name, payload))
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class FakeInvokeDaemon(InvokeDaemon):
+    """ The actual invoke-daemon command, with services invoked the same way as in FakeInvoke.
+    """
+    get_client = FakeInvoke.get_client
+    invoke_service = FakeInvoke.invoke_service
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+# Speaks the same protocol that 'zato service invoke-daemon' does, replying with the name of each service and its payload
+fake_daemon_code = """
+import json, sys
+
+sys.stdout.write('Starting\\n')
+sys.stdout.write({ready_marker!r} + '\\n')
+sys.stdout.flush()
+
+for line in sys.stdin:
+    request = json.loads(line)
+    if request['service'] == {exit_service!r}:
+        sys.exit({exit_code})
+
+    sys.stdout.write(json.dumps({{'stdout': '{{}}:{{}}\\n'.format(request['service'], request['payload']), 'exit_code': 0}}))
+    sys.stdout.write('\\n')
+    sys.stdout.flush()
+""".format(ready_marker=InvokeDaemon.ready_marker, exit_service=exit_service, exit_code=exit_code)
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class FakeDaemonInvoker(CommandLineServiceInvoker):
+    """ Uses a fake daemon instead of 'zato service invoke-daemon'.
+    """
+    def __init__(self):
+        super().__init__(check_stdout=False, use_daemon=True)
+
+    def _get_daemon_args(self):
+        return [sys.executable, '-c', fake_daemon_code]
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class CommandLineServiceInvokerTestCase(TestCase):
+
+    def get_sh_result(self, stdout, exit_code):
+        """ Returns what sh would return for a command that prints stdout and exits with exit_code.
+        """
+        python = sh.Command(sys.executable)
+        code = 'import sys; sys.stdout.write({!r}); sys.exit({})'.format(stdout, exit_code)
+
+        return python('-c', code, _ok_code=[exit_code])
+
+# ################################################################################################################################
+
+    def assert_same_shape(self, out, sh_out):
+        self.assertIsInstance(out, str)
+        self.assertEqual(str(out), str(sh_out))
+        self.assertEqual(out.stdout, sh_out.stdout)
+        self.assertEqual(out.exit_code, sh_out.exit_code)
+
+# ################################################################################################################################
+
+    def test_invoke_same_shape_as_sh(self):
+
+        with patch('zato.cli.service.Invoke', FakeInvoke):
+            invoker = CommandLineServiceInvoker(check_stdout=False)
+            out = invoker.invoke('zato.ping', {'abc': 123})
+
+        self.assert_same_shape(out, self.get_sh_result('zato.ping:{"abc": 123}\n', 0))
+
+# ################################################################################################################################
+
+    def test_invoke_system_exit_same_shape_as_sh(self):
+
+        with patch('zato.cli.service.Invoke', FakeInvoke):
+            invoker = CommandLineServiceInvoker(check_stdout=False)
+            out = invoker.invoke(exit_service, {})
+
+        self.assert_same_shape(out, self.get_sh_result('Exiting\n', exit_code))
+
+# ################################################################################################################################
+
+    def test_invoke_exit_message(self):
+
+        with patch('zato.cli.service.Invoke', FakeInvoke):
+            invoker = CommandLineServiceInvoker(check_stdout=False)
+            out = invoker.invoke(exit_message_service, {})
+
+        # Same as with a process of its own, exiting with a message means exit code 1
+        self.assertEqual(out.exit_code, 1)
+
+# ################################################################################################################################
+
+    def test_invoke_exception(self):
+
+        with patch('zato.cli.service.Invoke', FakeInvoke):
+            invoker = CommandLineServiceInvoker(check_stdout=False)
+            out = invoker.invoke(exception_service, {})
+
+        # Exceptions are handled by the command the same way they are on the command line
+        self.assertEqual(out.exit_code, Invoke.SYS_ERROR.EXCEPTION_CAUGHT)
+        self.assertIn('Invocation error', str(out))
+
+# ################################################################################################################################
+
+    def test_invoke_file_missing(self):
+
+        invoker = CommandLineServiceInvoker(check_stdout=False, server_location=rand_string())
+        out = invoker.invoke('zato.ping', {})
+
+        # The server directory does not exist so the command exits before trying to invoke the service
+        self.assertEqual(out.exit_code, Invoke.SYS_ERROR.FILE_MISSING)
+
+# ################################################################################################################################
+
+    def test_invoke_keeps_stdin_and_logger(self):
+
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b'line\n')
+        os.close(write_fd)
+
+        original_stdin = sys.stdin
+        sys.stdin = os.fdopen(read_fd)
+
+        try:
+            with patch('zato.cli.service.Invoke', FakeInvoke):
+                invoker = CommandLineServiceInvoker(check_stdout=False)
+                invoker.invoke('zato.ping', {})
+
+            # The command did not read what was meant for us ..
+            self.assertEqual(sys.stdin.readline(), 'line\n')
+
+        finally:
+            sys.stdin.close()
+            sys.stdin = original_stdin
+
+        # .. and it did not leave any handlers writing to the stdout it was given.
+        self.assertListEqual(logging.getLogger(FakeInvoke.__name__).handlers, [])
+
+# ################################################################################################################################
+
+    def test_invoke_many(self):
+
+        calls = [
+            ('zato.ping1', {'abc': 1}),
+            ('zato.ping2', {}),
+            ('zato.ping3', {'abc': 3}),
+        ]
+
+        with patch('zato.cli.service.Invoke', FakeInvoke):
+            invoker = CommandLineServiceInvoker(check_stdout=False)
+
+            results = invoker.invoke_many(calls)
+            expected = [invoker.invoke(service, request) for service, request in calls]
+
+        # Each result is in the same position as its call and has the same output that .invoke would have had
+        self.assertEqual(len(results), len(calls))
+
+        for result, expected_result in zip(results, expected):
+            self.assertEqual(result.stdout, expected_result.stdout)
+            self.assertEqual(result.exit_code, expected_result.exit_code)
+
+        self.assertEqual(str(results[0]), 'zato.ping1:{"abc": 1}\n')
+        self.assertEqual(str(results[1]), 'zato.ping2:None\n')
+        self.assertEqual(str(results[2]), 'zato.ping3:{"abc": 3}\n')
+
+# ################################################################################################################################
+
+    def test_invoke_many_exception(self):
+
+        calls = [
+            ('zato.ping1', {}),
+            (exception_service, {}),
+            ('zato.ping3', {}),
+        ]
+
+        with patch('zato.cli.service.Invoke', FakeInvoke):
+            invoker = CommandLineServiceInvoker(check_stdout=False)
+            results = invoker.invoke_many(calls)
+
+        # The failed call has the same exit code that .invoke would have had and it did not stop the next one
+        self.assertEqual(results[0].exit_code, 0)
+        self.assertEqual(results[1].exit_code, Invoke.SYS_ERROR.EXCEPTION_CAUGHT)
+        self.assertIn('Invocation error', str(results[1]))
+        self.assertEqual(results[2].exit_code, 0)
+        self.assertEqual(str(results[2]), 'zato.ping3:None\n')
+
+# ################################################################################################################################
+
+    def test_invoke_daemon_protocol(self):
+
+        requests = [
+            dumps({'service': 'zato.ping', 'payload': dumps({'abc': 123})}),
+            '',
+            dumps({'service': 'zato.ping2'}),
+            dumps({'service': exception_service}),
+            'not-json',
+        ]
+
+        args = CommandLineServiceInvoker(check_stdout=False)._get_command_args()
+        stdout = StringIO()
+
+        with redirect_stdout(stdout):
+
+            # The command reads stdin when it is created, which is why it is given an empty one at that point ..
+            with open(os.devnull) as devnull:
+                with patch('sys.stdin', devnull):
+                    command = FakeInvokeDaemon(args)
+
+            # .. whereas this is what it reads requests from.
+            with patch('sys.stdin', StringIO('\n'.join(requests) + '\n')):
+                command.execute(args)
+
+        logging.getLogger(FakeInvokeDaemon.__name__).handlers.clear()
+
+        ready, reply1, reply2, reply3, reply4 = stdout.getvalue().splitlines()
+        reply1, reply2, reply3, reply4 = [loads(elem) for elem in (reply1, reply2, reply3, reply4)]
+
+        # The daemon signals that it is ready before it reads any requests ..
+        self.assertEqual(ready, InvokeDaemon.ready_marker)
+
+        # .. each reply has the output of 'zato service invoke' and its exit code ..
+        self.assertDictEqual(reply1, {'stdout': 'zato.ping:{"abc": 123}\n', 'exit_code': 0})
+        self.assertDictEqual(reply2, {'stdout': 'zato.ping2:None\n', 'exit_code': 0})
+
+        # .. empty lines are skipped, while errors, including invalid requests, are replied to with a traceback.
+        self.assertEqual(reply3['exit_code'], InvokeDaemon.SYS_ERROR.EXCEPTION_CAUGHT)
+        self.assertIn('Invocation error', reply3['stdout'])
+
+        self.assertEqual(reply4['exit_code'], InvokeDaemon.SYS_ERROR.EXCEPTION_CAUGHT)
+        self.assertIn('JSONDecodeError', reply4['stdout'])
+
+# ################################################################################################################################
+
+    def test_daemon_ready(self):
+
+        with FakeDaemonInvoker() as invoker:
+
+            # Lines before the ready marker are skipped and the daemon keeps running once it is ready ..
+            daemon = invoker._get_daemon()
+            self.assertIsNone(daemon.poll())
+
+            # .. the same daemon is used by each invocation ..
+            self.assertIs(invoker._get_daemon(), daemon)
+
+        # .. and it is stopped when we are done with the invoker.
+        self.assertIsNone(invoker.daemon)
+        self.assertEqual(daemon.returncode, 0)
+
+# ################################################################################################################################
+
+    def test_daemon_request_reply(self):
+
+        with FakeDaemonInvoker() as invoker:
+            out1 = invoker.invoke('zato.ping', {'abc': 123})
+            out2 = invoker.invoke('zato.ping2', {})
+
+        self.assertEqual(str(out1), 'zato.ping:{"abc": 123}\n')
+        self.assertEqual(out1.stdout, b'zato.ping:{"abc": 123}\n')
+        self.assertEqual(out1.exit_code, 0)
+
+        self.assertEqual(str(out2), 'zato.ping2:None\n')
+        self.assertEqual(out2.exit_code, 0)
+
+# ################################################################################################################################
+
+    def test_daemon_exited(self):
+
+        with FakeDaemonInvoker() as invoker:
+            with self.assertRaises(Exception) as ctx:
+                invoker.invoke(exit_service, {})
+
+            # A daemon that exits is not used again
+            self.assertIsNone(invoker.daemon)
+
+        self.assertIn('Daemon exited before it replied', str(ctx.exception))
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+if __name__ == '__main__':
+    main()
+
+# ################################################################################################################################
+# ################################################################################################################################
@@ -26,6 +26,7 @@ class SECRETS:
 
     # Encrypted data has this prefix
     EncryptedMarker = 'gAAA'
+    EncryptedMarkerBytes = b'gAAA'
 
     # Zato secret (configuration)
     URL_PREFIX = 'zato+secret://'
@@ -197,14 +197,14 @@ class CryptoManager:
 
 # ################################################################################################################################
 
-    def decrypt(self, encrypted, _prefix=SECRETS.PREFIX_BYTES):
+    def decrypt(self, encrypted, _prefix=SECRETS.PREFIX_BYTES, _prefix_len=len(SECRETS.PREFIX_BYTES)):
         """ Returns input data in a clear-text, decrypted, form.
         """
         if not isinstance(encrypted, bytes):
             encrypted = encrypted.encode('utf8')
 
         if encrypted.startswith(_prefix):
-            encrypted = encrypted.replace(_prefix, b'')
+            encrypted = encrypted[_prefix_len:]
 
         return self.secret_key.decrypt(encrypted).decode('utf8')
 
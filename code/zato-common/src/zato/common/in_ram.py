@@ -58,6 +58,12 @@ class InRAMStore:
     def get_lock(self, key):
         # type: (str) -> RLock
 
+        # Key locks are never removed so, once a lock exists, it can be returned without taking the update lock ..
+        key_lock = self.key_lock.get(key)
+        if key_lock:
+            return key_lock
+
+        # .. otherwise, it needs to be created under the update lock.
         with self.update_lock:
             key_lock = self.key_lock.get(key)
             if not key_lock:
@@ -14,13 +14,17 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 
 # stdlib
 from datetime import datetime
+from decimal import Decimal
 from json import load, loads
 
 # BSON
 from bson import ObjectId
 
+# orjson
+from orjson import dumps as json_dumps, OPT_INDENT_2, OPT_NON_STR_KEYS
+
 # uJSON
-from ujson import dump, dumps as json_dumps
+from ujson import dump
 
 # ################################################################################################################################
 
@@ -34,27 +38,54 @@ loads = loads
 
 # ################################################################################################################################
 
+# Exact types of values that can be serialized as they are
+_simple_types = frozenset((str, int, float, bool, dict, list, tuple, type(None)))
+
+# Exact types of values that need to be converted first, mapped to their converters
+_converters = {
+
+    # Useful in various contexts
+    datetime: datetime.isoformat,
+
+    # Always use Unicode
+    bytes: lambda value: value.decode('utf8'),
+
+    # Serialized as numbers, the same way ujson did it
+    Decimal: float,
+
+    # For MongoDB queries
+    ObjectId: lambda value: 'ObjectId({})'.format(value),
+
+    # JSON has no sets so they become lists
+    set: list,
+}
+
+# ################################################################################################################################
+
 def _ensure_serializable(value, simple_type=(str, dict, int, float, list, tuple, set)):
 
-    if value is not None:
+    # Most values are of an exact type that we know of so we can handle them with a single dict lookup ..
+    value_type = type(value)
 
-        if not isinstance(value, simple_type):
+    if value_type in _simple_types:
+        return value
 
-            # Useful in various contexts
-            if isinstance(value, datetime):
-                value = value.isoformat()
+    converter = _converters.get(value_type)
+    if converter:
+        return converter(value)
 
-            # Always use Unicode
-            elif isinstance(value, bytes):
-                value = value.decode('utf8')
+    # .. whereas subclasses of these types need to be checked one by one.
+    if not isinstance(value, simple_type):
 
-            # For MongoDB queries
-            elif isinstance(value, ObjectId):
-                value = 'ObjectId({})'.format(value)
+        for base_type, converter in _converters.items():
+            if isinstance(value, base_type):
+                return converter(value)
 
-            else:
-                # We do not know how to serialize it
-                raise TypeError('Cannot serialize `{}` ({})'.format(value, type(value)))
+        # We do not know how to serialize it
+        raise TypeError('Cannot serialize `{}` ({})'.format(value, type(value)))
+
+    elif isinstance(value, set):
+        value = list(value)
 
     return value
 
@@ -62,14 +93,10 @@ def _ensure_serializable(value, simple_type=(str, dict, int, float, list, tuple,
 
 def dumps(data, indent=4):
 
-    if data is not None:
-
-        if isinstance(data, dict):
-            for key, value in data.items():
-                data[key] = _ensure_serializable(value)
-        else:
-            data = _ensure_serializable(value)
-
-    return json_dumps(data, indent=indent)
+    # orjson natively serializes all the common types, including datetime objects,
+    # which means that _ensure_serializable is needed only for the remaining ones.
+    # Note that orjson supports only two-space indentation.
+    option = OPT_NON_STR_KEYS | OPT_INDENT_2 if indent else OPT_NON_STR_KEYS
+    return json_dumps(data, default=_ensure_serializable, option=option).decode('utf8')
 
 # ################################################################################################################################
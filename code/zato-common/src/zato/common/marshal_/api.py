@@ -101,8 +101,7 @@ class Model:
 
     @classmethod
     def _zato_from_dict(class_, data):
-        api = MarshalAPI()
-        return api.from_dict(None, data, class_)
+        return _marshal_api.from_dict(None, data, class_)
 
     def to_dict(self):
         return asdict(self)
@@ -181,14 +180,82 @@ class DictCtx:
 
 # ################################################################################################################################
 
-    def init(self):
+    def init(self, model_info=None):
+        # type: (ModelInfo) -> None
+
+        # Reuse what we already know about the dataclass, if anything ..
+        if model_info:
+            self.has_init = model_info.has_init
+            self.fields = model_info.fields
+
+        # .. otherwise, check whether the dataclass defines the __init__method.
+        else:
+            dataclass_params = getattr(self.DataClass, _PARAMS, None)
+            self.has_init = dataclass_params.init if dataclass_params else False
+            self.fields = getattr(self.DataClass, _FIELDS) # type: dict
+
+        self.attrs_container = self.init_attrs if self.has_init else self.setattr_attrs
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class FieldInfo:
+    """ Describes a single field of a model. None of it depends on input data,
+    which is why it is built only once per model class and then reused by each FieldCtx.
+    """
+    def __init__(self, field):
+        # type: (Field) -> None
+
+        self.field = field
+        self.name  = field.name # type: str
+
+        # Assume we are required ..
+        self.is_required = True
+
+        # Use this by default ..
+        self.field_type = field.type
+
+        # .. unless it is a union with None = this field is really optional[type_]
+        if is_union(field.type):
+            _, self.field_type, union_with = extract_from_union(field.type)
+
+            # .. check if this was an optional field.
+            self.is_required = not (union_with is _None_Type)
+
+        self.is_class = isclass(field.type)
+        self.is_model = self.is_class and issubclass(field.type, Model)
+        self.is_list = is_list(field.type, self.is_class)
+
+        self.model_class = None # type: object
+        self.contains_model = False
+
+        #
+        # This is a list and we need to check if its definition
+        # contains information about the actual type of elements inside.
+        #
+        # If it does, in runtime, we will be extracting that particular type.
+        # Otherwise, we will just pass this list on as it is.
+        #
+        if self.is_list:
+            self.model_class = extract_model_class(field.type)
+            self.contains_model = bool(self.model_class and hasattr(self.model_class, _FIELDS))
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class ModelInfo:
+    """ Everything about a model class that MarshalAPI.from_dict needs, computed once per class.
+    """
+    def __init__(self, DataClass):
+        # type: (object) -> None
 
         # Whether the dataclass defines the __init__method
-        dataclass_params = getattr(self.DataClass, _PARAMS, None)
+        dataclass_params = getattr(DataClass, _PARAMS, None)
         self.has_init = dataclass_params.init if dataclass_params else False
 
-        self.attrs_container = self.init_attrs if self.has_init else self.setattr_attrs
-        self.fields = getattr(self.DataClass, _FIELDS) # type: dict
+        # All the fields that we will visit, always in the same order
+        self.fields = getattr(DataClass, _FIELDS) # type: dict
+        self.field_info_list = [FieldInfo(field) for _ignored_name, field in sorted(self.fields.items())]
 
 # ################################################################################################################################
 # ################################################################################################################################
@@ -227,23 +294,19 @@ class FieldCtx:
 
 # ################################################################################################################################
 
-    def init(self):
+    def init(self, field_info=None):
+        # type: (FieldInfo) -> None
 
         self.value = self.dict_ctx.current_dict.get(self.name, ZatoNotGiven)
-        self.is_class = isclass(self.field.type)
-        self.is_model = self.is_class and issubclass(self.field.type, Model)
-        self.is_list = is_list(self.field.type, self.is_class)
 
-        #
-        # This is a list and we need to check if its definition
-        # contains information about the actual type of elements inside.
-        #
-        # If it does, in runtime, we will be extracting that particular type.
-        # Otherwise, we will just pass this list on as it is.
-        #
-        if self.is_list:
-            self.model_class = extract_model_class(self.field.type)
-            self.contains_model = bool(self.model_class and hasattr(self.model_class, _FIELDS))
+        # Everything else does not depend on input data so it can be built upfront
+        field_info = field_info or FieldInfo(self.field)
+
+        self.is_class       = field_info.is_class
+        self.is_model       = field_info.is_model
+        self.is_list        = field_info.is_list
+        self.model_class    = field_info.model_class
+        self.contains_model = field_info.contains_model
 
 # ################################################################################################################################
 
@@ -259,8 +322,20 @@ class FieldCtx:
 class MarshalAPI:
 
     def __init__(self):
+
+        # Model classes -> ModelInfo objects describing them
         self._field_cache = {}
 
+# ################################################################################################################################
+
+    def get_model_info(self, DataClass):
+        # type: (object) -> ModelInfo
+        try:
+            return self._field_cache[DataClass]
+        except KeyError:
+            model_info = self._field_cache[DataClass] = ModelInfo(DataClass)
+            return model_info
+
 # ################################################################################################################################
 
     def get_validation_error(self, field_ctx):
@@ -328,35 +403,21 @@ class MarshalAPI:
     def from_dict(self, service, current_dict, DataClass, extra=None, list_idx=None, parent=None):
         # type: (Service, dict, object, list, dict, int) -> any_
 
-        dict_ctx = DictCtx(service, current_dict, DataClass, list_idx)
-        dict_ctx.init()
-
-        # All fields that we will visit
-        field_items = sorted(dict_ctx.fields.items()) # type: (str, Field)
-
-        for _ignored_name, _field in field_items:
-
-            # Assume we are required ..
-            is_required = True
+        # Everything that we know about this model class regardless of input data
+        model_info = self.get_model_info(DataClass)
 
-            # Use this by default ..
-            field_type = _field.type
-
-            # .. unless it is a union with None = this field is really optional[type_]
-            if is_union(_field.type):
-                result = extract_from_union(_field.type)
-                _, field_type, union_with = result
+        dict_ctx = DictCtx(service, current_dict, DataClass, list_idx)
+        dict_ctx.init(model_info)
 
-                # .. check if this was an optional field.
-                is_required = not (union_with is _None_Type)
+        for field_info in model_info.field_info_list:
 
             # Represents a current field in the model in the context of the input dict ..
-            field_ctx = FieldCtx(dict_ctx, _field, parent)
-            field_ctx.is_required = is_required
-            field_ctx.field_type = field_type
+            field_ctx = FieldCtx(dict_ctx, field_info.field, parent)
+            field_ctx.is_required = field_info.is_required
+            field_ctx.field_type = field_info.field_type
 
             # .. this call will populate the initial value of the field as well (field_ctx..
-            field_ctx.init()
+            field_ctx.init(field_info)
 
             # If this field points to a model ..
             if field_ctx.is_model:
@@ -377,7 +438,7 @@ class MarshalAPI:
                 if field_ctx.model_class:
 
                     # Enter further only if we have any value at all to check
-                    if field_ctx.value and field_ctx.value != ZatoNotGiven:
+                    if field_ctx.value and field_ctx.value is not ZatoNotGiven:
 
                         # However, that model class may actually point to <type 'str'> types
                         # in case of fields like strlist, and we need to take that into account
@@ -385,15 +446,17 @@ class MarshalAPI:
                         if field_ctx.is_model or field_ctx.contains_model:
                             field_ctx.value = self._visit_list(field_ctx)
 
+            # Local alias - the sentinel is always the same object so identity checks are enough below
+            value = field_ctx.value
+
             # If we do not have a value yet, perhaps we will find a default one
-            if field_ctx.value == ZatoNotGiven:
-                if field_ctx.field.default and field_ctx.field.default is not MISSING:
-                    field_ctx.value = field_ctx.field.default
+            if value is ZatoNotGiven:
+                default = field_ctx.field.default
+                if default and default is not MISSING:
+                    value = field_ctx.value = default
 
             # Let's check if found any value
-            if field_ctx.value != ZatoNotGiven:
-                value = field_ctx.value
-            else:
+            if value is ZatoNotGiven:
                 if field_ctx.is_required:
                     raise self.get_validation_error(field_ctx)
                 else:
@@ -416,11 +479,12 @@ class MarshalAPI:
             # Assign the value now
             dict_ctx.attrs_container[field_ctx.name] = value
 
-            # If we have any extra elements, we need to add them as well
-            if extra:
-                for param, value in extra.items():
-                    if param not in dict_ctx.attrs_container:
-                        dict_ctx.attrs_container[param] = value
+        # If we have any extra elements, we need to add them as well,
+        # but only once all the fields have been visited.
+        if extra:
+            for param, value in extra.items():
+                if param not in dict_ctx.attrs_container:
+                    dict_ctx.attrs_container[param] = value
 
         # Create a new instance, potentially with attributes ..
         instance = DataClass(**dict_ctx.init_attrs) # type: Model
@@ -444,3 +508,9 @@ class MarshalAPI:
 
 # ################################################################################################################################
 # ################################################################################################################################
+
+# A process-wide instance so that information about each model class is built only once
+_marshal_api = MarshalAPI()
+
+# ################################################################################################################################
+# ################################################################################################################################
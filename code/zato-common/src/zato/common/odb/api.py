@@ -623,17 +623,29 @@ class ODBManager(SessionWrapper):
         missing = set()
 
         with closing(self.session()) as session:
-            server_services = session.query(
-                Service.id, Service.name,
-                DeployedService.source_path, DeployedService.source).\
+
+            # First, we look up names only - in the most common case, nothing will be missing,
+            # and then there is no need to fetch the source code of all the services ..
+            server_service_names = session.query(Service.name).\
                 join(DeployedService, Service.id==DeployedService.service_id).\
                 join(Server, DeployedService.server_id==Server.id).\
                 filter(Service.is_internal!=true()).\
                 all()
 
-            for item in server_services:
-                if item.name not in locally_deployed:
-                    missing.add(item)
+            missing_names = {item.name for item in server_service_names if item.name not in locally_deployed}
+
+            # .. otherwise, we need the full information, but only about the services that are actually missing.
+            if missing_names:
+                server_services = session.query(
+                    Service.id, Service.name,
+                    DeployedService.source_path, DeployedService.source).\
+                    join(DeployedService, Service.id==DeployedService.service_id).\
+                    join(Server, DeployedService.server_id==Server.id).\
+                    filter(Service.is_internal!=true()).\
+                    filter(Service.name.in_(missing_names)).\
+                    all()
+
+                missing.update(server_services)
 
         return missing
 
@@ -22,9 +22,6 @@ logger = logging.getLogger(__name__)
 logger_bzr = logging.getLogger('bzr')
 logger_bzr.setLevel(logging.WARN)
 
-logger_sh = logging.getLogger('sh.command')
-logger_sh.setLevel(logging.WARN)
-
 # ################################################################################################################################
 
 # We use Bazaar under Zato 3.0 with Python 2.7. Any newer version of Zato, or Zato 3.0 with Python 3.x, uses git.
@@ -47,34 +44,45 @@ class PassThroughRepoManager(_BaseRepoManager):
 # ################################################################################################################################
 
 class GitRepoManager(_BaseRepoManager):
-    def ensure_repo_consistency(self):
 
-        # Use sh for git commands
-        import sh
+    def _git(self, *args:'str') -> 'str':
+        """ Runs a git command in the repository's directory and returns its stdout.
+        """
+        # stdlib
+        from subprocess import PIPE, run
+
+        result = run(['git'] + list(args), cwd=self.repo_location, stdout=PIPE, stderr=PIPE, check=True,
+            universal_newlines=True)
+
+        return result.stdout
+
+# ################################################################################################################################
+
+    def ensure_repo_consistency(self):
 
         # Always work in the same directory as the repository is in
-        sh.cd(self.repo_location)
+        os.chdir(self.repo_location)
 
         # (Re-)init the repository
-        sh.git.init(self.repo_location)
+        self._git('init', self.repo_location)
 
         # Set user info
         current_user = get_current_user()
-        sh.git.config('user.name', current_user)
-        sh.git.config('user.email', '{}@{}'.format(current_user, socket.getfqdn()))
+        self._git('config', 'user.name', current_user)
+        self._git('config', 'user.email', '{}@{}'.format(current_user, socket.getfqdn()))
 
         # Default branch is called 'main'
-        sh.git.checkout('-B', 'main')
+        self._git('checkout', '-B', 'main')
 
         # Add all files
-        sh.git.add('-A', self.repo_location)
+        self._git('add', '-A', self.repo_location)
 
-        output = sh.git.status('--porcelain') # type: str
+        output = self._git('status', '--porcelain') # type: str
         output = output.strip()
 
         # And commit changes if there are any
         if output:
-            sh.git.commit('-m', 'Committing latest changes')
+            self._git('commit', '-m', 'Committing latest changes')
 
 # ################################################################################################################################
 # ################################################################################################################################
@@ -483,11 +483,12 @@ def payload_from_request(json_parser, cid, request, data_format, transport, chan
                 try:
                     request_bytes = request if isinstance(request, bytes) else request.encode('utf8')
                     try:
-                        payload = json_parser.parse(request_bytes)
+                        # Parsing recursively returns regular Python objects rather than proxies to the parser's buffers,
+                        # which means that nothing refers to these buffers once we return and the same parser,
+                        # along with its already allocated memory, can be safely reused for the next request.
+                        payload = json_parser.parse(request_bytes, True)
                     except ValueError:
                         payload = request_bytes
-                    if hasattr(payload, 'as_dict'):
-                        payload = payload.as_dict()
                 except ValueError:
                     logger.warning('Could not parse request as JSON:`%s`, (%s), e:`%s`', request, type(request), format_exc())
                     raise
@@ -1221,9 +1222,8 @@ class StaticConfig(Bunch):
 
     def read_file(self, full_path, file_name):
         # type: (str, str) -> None
-        f = open(full_path, encoding='utf8')
-        file_contents = f.read()
-        f.close()
+        with open(full_path, encoding='utf8') as f:
+            file_contents = f.read()
 
         # Convert to a Path object to prepare to manipulations ..
         full_path = Path(full_path)
@@ -1261,13 +1261,16 @@ class StaticConfig(Bunch):
                 _bunch[file_name] = file_contents
 
     def read_directory(self, root_dir):
-        for elem in Path(root_dir).rglob('*'): # type: Path
-            full_path = str(elem)
-            try:
-                if elem.is_file():
-                    self.read_file(full_path, elem.name)
-            except Exception as e:
-                logger.warning('Could not read file `%s`, e:`%s`', full_path, e.args)
+
+        # os.walk uses scandir underneath so, unlike with Path.rglob, we do not need to stat each entry
+        # to learn whether it is a file or a directory.
+        for dir_path, _ignored_dir_names, file_names in os.walk(root_dir):
+            for file_name in file_names:
+                full_path = os.path.join(dir_path, file_name)
+                try:
+                    self.read_file(full_path, file_name)
+                except Exception as e:
+                    logger.warning('Could not read file `%s`, e:`%s`', full_path, e.args)
 
 # ################################################################################################################################
 
@@ -7,35 +7,36 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 """
 
 # stdlib
-from json import dumps
 import select
 import sys
 
-# sh
-import sh
+# Note that all the other imports are done in the functions that need them - this module is imported
+# by each CLI command through read_stdin_data, which is why it should not import anything else on its own.
 
 # ################################################################################################################################
 # ################################################################################################################################
 
 if 0:
-    from sh import RunningCommand
-    from zato.common.typing_ import any_, anydict
+    from zato.common.typing_ import any_, anydict, anylist, strnone
 
 # ################################################################################################################################
 # ################################################################################################################################
 
 def read_stdin_data(strip=True):
-    """ Reads data from sys.stdin without blocking the caller - in its current form (using select),
+    """ Reads data from sys.stdin without blocking the caller - in its current form (using poll),
     it will work only on Linux and OS X.
     """
     if sys.platform.startswith('win32'):
         return ''
+
     # Note that we check only sys.stdin for read and that there is no timeout,
     # because we expect for sys.stdin to be available immediately when we run.
-    to_read, _, _ = select.select([sys.stdin], [], [], 0)
+    # A poll object is created each time because sys.stdin may have been replaced since the previous call.
+    stdin_poll = select.poll()
+    stdin_poll.register(sys.stdin.fileno(), select.POLLIN)
 
-    if to_read:
-        data = to_read[0].readline()
+    if stdin_poll.poll(0):
+        data = sys.stdin.readline()
         out = data.strip() if strip else data
     else:
         out = ''
@@ -45,13 +46,35 @@ def read_stdin_data(strip=True):
 # ################################################################################################################################
 # ################################################################################################################################
 
+class CommandLineResult(str):
+    """ Output of a command, in the same shape as sh.RunningCommand - it is the command's stdout as a string
+    with its stdout as bytes and its exit code as attributes.
+    """
+    stdout: 'bytes'
+    exit_code: 'int'
+
+    @staticmethod
+    def from_stdout(stdout:'str', exit_code:'int'=0) -> 'CommandLineResult':
+        out = CommandLineResult(stdout)
+        out.stdout = stdout.encode('utf8')
+        out.exit_code = exit_code
+        return out
+
+# ################################################################################################################################
+# ################################################################################################################################
+
 class CommandLineServiceInvoker:
+
+    # Maps values of $PATH to the full path of the zato command found in them - shared by all the instances of this class
+    _zato_path_cache = {} # type: anydict
+
     def __init__(
         self,
         expected_stdout=b'',  # type: bytes
         check_stdout=True,    # type: bool
         check_exit_code=True, # type: bool
-        server_location=''    # type: str
+        server_location='',   # type: str
+        use_daemon=False      # type: bool
         ) -> 'None':
 
         # Imported here to rule out circular references
@@ -63,7 +86,11 @@ class CommandLineServiceInvoker:
         self.expected_stdout = expected_stdout or TestConfig.default_stdout
         self.server_location = server_location or TestConfig.server_location
 
-    def _assert_command_line_result(self, out:'RunningCommand') -> 'None':
+        # If use_daemon is True, all the invocations go through a single, long-running 'zato service invoke-daemon' process
+        self.use_daemon = use_daemon
+        self.daemon = None # type: any_
+
+    def _assert_command_line_result(self, out:'CommandLineResult') -> 'None':
 
         if self.check_exit_code:
             if out.exit_code != 0:
@@ -73,25 +100,256 @@ class CommandLineServiceInvoker:
             if out.stdout != self.expected_stdout:
                 raise ValueError(f'Stdout should {self.expected_stdout} instead of {out.stdout}')
 
+# ################################################################################################################################
+
+    def _get_payload(self, request:'anydict') -> 'strnone':
+
+        # An empty request, which is what invoke_and_test sends, means no payload at all,
+        # so there is nothing to serialize.
+        if not request:
+            return None
+
+        # stdlib
+        from json import dumps
+
+        return dumps(request)
+
+# ################################################################################################################################
+
+    def _get_zato_path(self) -> 'str':
+
+        # stdlib
+        from os import environ
+        from shutil import which
+
+        path = environ.get('PATH', '')
+
+        try:
+            return self._zato_path_cache[path]
+        except KeyError:
+            zato_path = self._zato_path_cache[path] = which('zato', path=path) or 'zato'
+            return zato_path
+
+# ################################################################################################################################
+
+    def __enter__(self) -> 'CommandLineServiceInvoker':
+        return self
+
+    def __exit__(self, *ignored_args:'any_') -> 'None':
+        self.close()
+
+# ################################################################################################################################
+
+    def _get_daemon_args(self) -> 'anylist':
+        return [self._get_zato_path(), 'service', 'invoke-daemon', self.server_location]
+
+# ################################################################################################################################
+
+    def _get_daemon(self) -> 'any_':
+
+        # stdlib
+        from atexit import register
+        from subprocess import PIPE, Popen
+
+        # Zato
+        from zato.cli.service import InvokeDaemon
+
+        if not self.daemon:
+            self.daemon = Popen(self._get_daemon_args(), stdin=PIPE, stdout=PIPE, universal_newlines=True)
+
+            # Make sure that the daemon is stopped even if our caller does not do it explicitly
+            register(self.close)
+
+            # Wait until the daemon is ready to read requests
+            while True:
+                line = self.daemon.stdout.readline()
+                if not line:
+                    raise Exception('Daemon exited before it was ready, exit code `{}`'.format(self.daemon.wait()))
+                elif line.strip() == InvokeDaemon.ready_marker:
+                    break
+
+        return self.daemon
+
+# ################################################################################################################################
+
+    def _invoke_daemon(self, service:'str', request:'anydict') -> 'CommandLineResult':
+
+        # stdlib
+        from json import dumps, loads
+
+        daemon = self._get_daemon()
+
+        try:
+            daemon.stdin.write(dumps({'service': service, 'payload': self._get_payload(request)}))
+            daemon.stdin.write('\n')
+            daemon.stdin.flush()
+            line = daemon.stdout.readline()
+        except BrokenPipeError:
+            line = ''
+
+        # An empty line means that the daemon exited, in which case a new one will be started on next invocation
+        if not line:
+            self.daemon = None
+            raise Exception('Daemon exited before it replied, exit code `{}`'.format(daemon.poll()))
+
+        reply = loads(line)
+        return CommandLineResult.from_stdout(reply['stdout'], reply['exit_code'])
+
+# ################################################################################################################################
+
+    def close(self) -> 'None':
+        """ Stops the daemon process, if there is one.
+        """
+        if self.daemon:
+
+            # stdlib
+            from atexit import unregister
+
+            unregister(self.close)
+
+            self.daemon.stdin.close()
+            self.daemon.wait()
+            self.daemon = None
+
+# ################################################################################################################################
+
+    def _get_command_args(self) -> 'any_':
+        """ Returns arguments for the 'zato service invoke' command, with the same defaults that the command line parser would use.
+        """
+
+        # Bunch
+        from bunch import Bunch
+
+        # Zato
+        from zato.cli.service import Invoke
+
+        args = Bunch(verbose=False, store_log=False, store_config=False)
+
+        for opt in Invoke.opts:
+            name = opt['name'].lstrip('-').replace('-', '_')
+            args[name] = opt.get('default')
+
+        args.path = self.server_location
+
+        return args
+
+# ################################################################################################################################
+
+    def _new_command(self, args:'any_') -> 'any_':
+        """ Returns a new 'zato service invoke' command. Its constructor reads stdin, which in our case is our caller's,
+        so it is given an empty one instead, the same as it would have been in a process of its own.
+        """
+
+        # stdlib
+        import os
+
+        # Zato
+        from zato.cli.service import Invoke
+
+        original_stdin = sys.stdin
+        sys.stdin = open(os.devnull)
+
+        try:
+            command = Invoke(args)
+        finally:
+            sys.stdin.close()
+            sys.stdin = original_stdin
+
+        return command
+
+# ################################################################################################################################
+
+    def _close_command(self, command:'any_') -> 'None':
+
+        # The command's logger is shared by all the commands of its class and its handler writes to the sys.stdout
+        # that was in place when the command was created, which is why the handlers are removed once we are done.
+        command.logger.handlers.clear()
+
 # ################################################################################################################################
 
     def invoke(self, service:'str', request:'anydict') -> 'any_':
-        command = sh.zato # type: ignore
+        """ Runs the same command that 'zato service invoke' does, either in the current process or in a long-running daemon,
+        which means that there is no need to start a new Python interpreter and import all of Zato for each invocation.
+        """
+        if self.use_daemon:
+            return self._invoke_daemon(service, request)
+
+        # stdlib
+        from contextlib import redirect_stdout
+        from io import StringIO
+
+        # Use the same defaults that the command line parser would use ..
+        args = self._get_command_args()
+
+        # .. and fill in the actual parameters ..
+        args.name = service
+        args.payload = self._get_payload(request)
+
+        # .. the command writes its output to sys.stdout which we capture here ..
+        stdout = StringIO()
+        exit_code = 0
+
+        # .. it is run the same way that the command line runs it, which means that it always ends in SystemExit ..
+        with redirect_stdout(stdout):
+            command = self._new_command(args)
+            try:
+                command.run(args)
+            except SystemExit as e:
+
+                # .. whose code becomes the exit code the same way it would for a process of its own ..
+                if e.code is None:
+                    exit_code = 0
+                elif isinstance(e.code, int):
+                    exit_code = e.code
+                else:
+                    exit_code = 1
+
+            finally:
+                self._close_command(command)
+
+        # .. and return it in the same format that sh would.
+        return CommandLineResult.from_stdout(stdout.getvalue(), exit_code)
+
+# ################################################################################################################################
+
+    def invoke_many(self, calls:'anylist') -> 'anylist':
+        """ Invokes each of the (service, request) pairs given on input and returns a list of their results, in the same order.
+        All the services are invoked through a single client, created once for the whole batch.
+        """
+        if self.use_daemon:
+            return [self._invoke_daemon(service, request) for service, request in calls]
+
+        # stdlib
+        from contextlib import redirect_stdout
+        from io import StringIO
+        from traceback import format_exc
+
+        out = []
+        args = self._get_command_args()
+
+        # The command and its client may log something while they are being created, which we are not interested in
+        with redirect_stdout(StringIO()):
+            command = self._new_command(args)
 
-        cli_params = []
+        try:
+            with redirect_stdout(StringIO()):
+                client = command.get_client(args)
 
-        cli_params.append('service')
-        cli_params.append('invoke')
+            for service, request in calls:
 
-        if request:
-            request = dumps(request)
-            cli_params.append('--payload')
-            cli_params.append(request)
+                # Each call has its own result, which means that a failure of one does not stop the ones that follow,
+                # and the exit code of a failed call is the same as the command would have exited with.
+                try:
+                    response = command.invoke_service(client, args, service, self._get_payload(request))
+                except Exception:
+                    result = CommandLineResult.from_stdout(format_exc(), command.SYS_ERROR.EXCEPTION_CAUGHT)
+                else:
+                    result = CommandLineResult.from_stdout('{}\n'.format(command.get_output(response)))
 
-        cli_params.append(self.server_location)
-        cli_params.append(service)
+                out.append(result)
+        finally:
+            self._close_command(command)
 
-        out = command(*cli_params)
         return out
 
 # ################################################################################################################################
@@ -8,44 +8,191 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 
 # stdlib
 import os
-import re
+import select
 import string
-from datetime import datetime, timedelta
-from time import sleep
+import struct
+import sys
+from datetime import datetime
+from time import monotonic, sleep
 
 # ################################################################################################################################
 
 if 0:
-    from zato.common.typing_ import callable_
+    from zato.common.typing_ import callable_, optional
 
 # ################################################################################################################################
 
-_re_fs_safe_name = '[{}]'.format(string.punctuation + string.whitespace)
+_fs_unsafe_chars = string.punctuation + string.whitespace
+
+# Kept for backward compatibility with code that may still import it
+_re_fs_safe_name = '[{}]'.format(_fs_unsafe_chars)
+
+# Maps each character unsafe for filesystem names to an underscore
+_fs_safe_table = str.maketrans(_fs_unsafe_chars, '_' * len(_fs_unsafe_chars))
 
 # ################################################################################################################################
 
 def fs_safe_name(value:'str') -> 'str':
-    return re.sub(_re_fs_safe_name, '_', value)
+    return value.translate(_fs_safe_table)
 
 # ################################################################################################################################
 
+# The most recent second that fs_safe_now was called in, followed by that second's filesystem-safe representation
+# and, separately, the filesystem-safe form of its timezone offset, which is empty for naive datetime objects.
+# It is a tuple so that it can be replaced as a whole, without other threads seeing only some of its elements updated.
+_fs_safe_now_last_second = (None, '', '')
+
 def fs_safe_now(_utcnow:'callable_'=datetime.utcnow) -> 'str':
     """ Returns a UTC timestamp with any characters unsafe for filesystem names removed.
     """
-    return fs_safe_name(_utcnow().isoformat())
+    global _fs_safe_now_last_second
+
+    now = _utcnow()
+    microsecond = now.microsecond
+    second = now.replace(microsecond=0)
+
+    # Only the date and time up to seconds, as well as the timezone offset, need to be made safe, and only once per second ..
+    last_second, value, offset = _fs_safe_now_last_second
+    if second != last_second:
+        value = second.replace(tzinfo=None).isoformat()
+        offset = fs_safe_name(second.isoformat()[len(value):])
+        value = fs_safe_name(value)
+        _fs_safe_now_last_second = (second, value, offset)
+
+    # .. whereas microseconds, if there are any, consist of digits only and can be inserted between the two as they are,
+    # which gives the same result as fs_safe_name(now.isoformat()) would.
+    return '{}_{:06d}{}'.format(value, microsecond, offset) if microsecond else value + offset
 
 # ################################################################################################################################
 
-def wait_for_file(path:'str', max_wait:'int'=5) -> 'None':
+# inotify(7) event types that indicate that a new file appeared in a directory
+_inotify_in_create   = 0x00000100
+_inotify_in_moved_to = 0x00000080
+
+# Each inotify event starts with a header of int wd, uint32 mask, uint32 cookie, uint32 len
+_inotify_event_header = struct.Struct('iIII')
+
+# ################################################################################################################################
+
+def _wait_for_file_inotify(path:'str', max_wait:'int') -> 'optional[bool]':
+    """ Waits for a file using inotify on Linux. Returns True if the file was found, False if it was not
+    or None if inotify could not be used, in which case the caller should fall back to polling.
+    """
+    # stdlib
+    import ctypes
+    import ctypes.util
+
+    dir_name, base_name = os.path.split(os.path.abspath(path))
+    base_name = base_name.encode('utf8')
+
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        return None
+
+    try:
+        # The directory may not exist yet, in which case we cannot watch it
+        if libc.inotify_add_watch(fd, dir_name.encode('utf8'), _inotify_in_create | _inotify_in_moved_to) < 0:
+            return None
+
+        # The file may have been created before the watch was added
+        if os.path.exists(path):
+            return True
+
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        deadline = monotonic() + max_wait
+
+        while True:
+
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return False
+
+            if not poller.poll(remaining * 1000):
+                return False
+
+            data = os.read(fd, 65536)
+            offset = 0
+
+            while offset < len(data):
+                _, _, _, name_len = _inotify_event_header.unpack_from(data, offset)
+                offset += _inotify_event_header.size
+                name = data[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+
+                if name == base_name:
+                    return True
+    finally:
+        os.close(fd)
+
+# ################################################################################################################################
+
+def _wait_for_file_kqueue(path:'str', max_wait:'int') -> 'optional[bool]':
+    """ Waits for a file using kqueue on Mac and BSD systems, with the same return values as _wait_for_file_inotify.
+    """
+    try:
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return None
+
+    kq = select.kqueue()
+
+    try:
+        # We will be notified each time the directory changes ..
+        event = select.kevent(dir_fd, filter=select.KQ_FILTER_VNODE, flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+            fflags=select.KQ_NOTE_WRITE)
+        kq.control([event], 0, 0)
+
+        deadline = monotonic() + max_wait
+
+        # .. and we check if the file exists each time it does.
+        while True:
+
+            if os.path.exists(path):
+                return True
+
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return False
+
+            kq.control(None, 1, remaining)
+
+    finally:
+        kq.close()
+        os.close(dir_fd)
+
+# ################################################################################################################################
 
-    found = False
-    now   = datetime.utcnow()
-    until = now + timedelta(seconds=max_wait)
+def _wait_for_file_polling(path:'str', max_wait:'int') -> 'None':
 
-    while now < until:
-        found = os.path.exists(path)
-        if found:
+    # A monotonic clock is not affected by changes to system time and is cheaper than building datetime objects
+    deadline = monotonic() + max_wait
+
+    while monotonic() < deadline:
+
+        # This is still one system call per iteration, like os.path.exists, but without its Python-level wrapper
+        if os.access(path, os.F_OK):
             break
         else:
             sleep(0.05)
-            now = datetime.utcnow()
+
+# ################################################################################################################################
+
+def wait_for_file(path:'str', max_wait:'int'=5) -> 'None':
+    """ Waits up to max_wait seconds for a file to exist, using OS notifications if possible and polling otherwise.
+    """
+    found = None
+
+    if hasattr(select, 'kqueue'):
+        found = _wait_for_file_kqueue(path, max_wait)
+
+    elif sys.platform.startswith('linux'):
+        found = _wait_for_file_inotify(path, max_wait)
+
+    # Notifications could not be used so we need to poll
+    if found is None:
+        _wait_for_file_polling(path, max_wait)
+
+# ################################################################################################################################
@@ -85,8 +85,15 @@ class SharedMemoryIPC:
     def store(self, data):
         """ Serializes input data as JSON and stores it in RAM, overwriting any previous data.
         """
+        data = dumps(data).encode('utf8')
+
+        # Terminate the data with a NUL byte, if there is room for it, so that readers know where it ends
+        # without having to scan the whole segment, and so that any longer data stored previously is ignored.
+        if len(data) < self.size:
+            data += b'\x00'
+
         self._mmap.seek(0)
-        self._mmap.write(dumps(data).encode('utf8'))
+        self._mmap.write(data)
         self._mmap.flush()
 
 # ################################################################################################################################
@@ -104,8 +111,10 @@ class SharedMemoryIPC:
     def load(self, needs_loads=True):
         """ Reads in all data from RAM and, optionally, loads it as JSON.
         """
-        self._mmap.seek(0)
-        data = self._mmap.read(self.size).strip(b'\x00')
+        # Read only up to the terminating NUL byte rather than copying the whole segment, which may be many megabytes
+        end = self._mmap.find(b'\x00', 0)
+        data = self._mmap[:end] if end > -1 else self._mmap[:self.size]
+
         return loads(data.decode('utf8')) if needs_loads else data
 
 # ################################################################################################################################
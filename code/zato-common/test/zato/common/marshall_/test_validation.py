@@ -31,16 +31,22 @@ if 0:
 
 class ValidationTestCase(TestCase):
 
+    @classmethod
+    def setUpClass(cls) -> 'None':
+
+        # All the tests share the same API object, which means that they also share information about the models
+        cls.api = MarshalAPI()
+        cls.service = cast_('Service', None)
+
+# ################################################################################################################################
+
     def test_validate_top_simple_elem_missing(self):
 
         # Input is entirely missing here
         data = {}
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateUserRequest)
+            self.api.from_dict(self.service, data, CreateUserRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /request_id')
@@ -57,11 +63,8 @@ class ValidationTestCase(TestCase):
             'role_list': [],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateUserRequest)
+            self.api.from_dict(self.service, data, CreateUserRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /user')
@@ -82,11 +85,8 @@ class ValidationTestCase(TestCase):
             'role_list': [],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateUserRequest)
+            self.api.from_dict(self.service, data, CreateUserRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /user/address')
@@ -121,11 +121,8 @@ class ValidationTestCase(TestCase):
             ]
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateUserRequest)
+            self.api.from_dict(self.service, data, CreateUserRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /role_list[0]/name')
@@ -137,11 +134,8 @@ class ValidationTestCase(TestCase):
         # There is no input (and attr_list is a list that is missing)
         data = {}
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateAttrListRequest)
+            self.api.from_dict(self.service, data, CreateAttrListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /attr_list')
@@ -154,11 +148,8 @@ class ValidationTestCase(TestCase):
             'attr_list': [{}],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateAttrListRequest)
+            self.api.from_dict(self.service, data, CreateAttrListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /attr_list[0]/name')
@@ -171,10 +162,7 @@ class ValidationTestCase(TestCase):
             'attr_list': [],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
-        result = cast_('CreateAttrListRequest', api.from_dict(service, data, CreateAttrListRequest))
+        result = cast_('CreateAttrListRequest', self.api.from_dict(self.service, data, CreateAttrListRequest))
 
         # It is not an error to send a list that is empty,
         # which is unlike not sending the list at all (as checked in other tests).
@@ -190,11 +178,8 @@ class ValidationTestCase(TestCase):
             ],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateAttrListRequest)
+            self.api.from_dict(self.service, data, CreateAttrListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /attr_list[0]/name')
@@ -210,11 +195,8 @@ class ValidationTestCase(TestCase):
             ],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateAttrListRequest)
+            self.api.from_dict(self.service, data, CreateAttrListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /attr_list[1]/name')
@@ -234,11 +216,8 @@ class ValidationTestCase(TestCase):
             ],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreateAttrListRequest)
+            self.api.from_dict(self.service, data, CreateAttrListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /attr_list[5]/name')
@@ -255,11 +234,8 @@ class ValidationTestCase(TestCase):
             ]
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreatePhoneListRequest)
+            self.api.from_dict(self.service, data, CreatePhoneListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /phone_list[0]/attr_list[0]/name')
@@ -277,11 +253,8 @@ class ValidationTestCase(TestCase):
             ]
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreatePhoneListRequest)
+            self.api.from_dict(self.service, data, CreatePhoneListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /phone_list[0]/attr_list[1]/name')
@@ -298,11 +271,8 @@ class ValidationTestCase(TestCase):
             ]
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
         with self.assertRaises(ElementMissing) as cm:
-            api.from_dict(service, data, CreatePhoneListRequest)
+            self.api.from_dict(self.service, data, CreatePhoneListRequest)
 
         e = cm.exception # type: ElementMissing
         self.assertEqual(e.reason, 'Element missing: /phone_list[2]/attr_list[1]/name')
@@ -315,10 +285,7 @@ class ValidationTestCase(TestCase):
             'locality': 'abc'
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
-        result = api.from_dict(service, data, Address) # type: Address
+        result = self.api.from_dict(self.service, data, Address) # type: Address
 
         # This, we can test
         self.assertEqual(result.locality, data['locality'])
@@ -340,10 +307,7 @@ class ValidationTestCase(TestCase):
             'characteristics': [],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
-        result = api.from_dict(service, data, Address) # type: Address
+        result = self.api.from_dict(self.service, data, Address) # type: Address
 
         self.assertEqual(result.locality, data['locality'])
         self.assertEqual(result.post_code, '')
@@ -361,10 +325,7 @@ class ValidationTestCase(TestCase):
             'characteristics': [],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
-        result = api.from_dict(service, data, Address) # type: Address
+        result = self.api.from_dict(self.service, data, Address) # type: Address
 
         self.assertEqual(result.locality, data['locality'])
         self.assertEqual(result.post_code, '')
@@ -382,16 +343,39 @@ class ValidationTestCase(TestCase):
             'characteristics': [],
         }
 
-        service = cast_('Service', None)
-        api = MarshalAPI()
-
-        result = api.from_dict(service, data, AddressWithDefaults) # type: AddressWithDefaults
+        result = self.api.from_dict(self.service, data, AddressWithDefaults) # type: AddressWithDefaults
 
         self.assertEqual(result.locality, data['locality'])
         self.assertEqual(result.post_code, '')
         self.assertEqual(result.details, {})
         self.assertListEqual(result.characteristics, []) # type: ignore
 
+# ################################################################################################################################
+
+    def test_model_info_reused(self):
+
+        data = {
+            'locality': rand_string(),
+        }
+
+        model_info = self.api.get_model_info(Address)
+
+        result1 = self.api.from_dict(self.service, data, Address) # type: Address
+        result2 = self.api.from_dict(self.service, {}, AddressWithDefaults) # type: AddressWithDefaults
+
+        # The same information is reused by each call ..
+        self.assertIs(self.api.get_model_info(Address), model_info)
+
+        # .. but it never leaks from one model or call to another.
+        self.assertEqual(result1.locality, data['locality'])
+        self.assertEqual(result2.post_code, '12345')
+
+        with self.assertRaises(ElementMissing) as cm:
+            self.api.from_dict(self.service, {}, Address)
+
+        e = cm.exception # type: ElementMissing
+        self.assertEqual(e.reason, 'Element missing: /locality')
+
 # ################################################################################################################################
 # ################################################################################################################################
 
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (C) 2022, Zato Source s.r.o. https://zato.io
+
+Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
+"""
+
+# stdlib
+from datetime import datetime
+from decimal import Decimal
+from json import loads
+from unittest import main, TestCase
+
+# Zato
+from zato.common.json_ import dumps
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class DumpsTestCase(TestCase):
+
+    def test_dumps_dict_is_not_modified(self):
+
+        now = datetime(2022, 11, 22, 1, 2, 3)
+        data = {'abc': 123, 'now': now, 'raw': b'zxc'}
+
+        result = dumps(data)
+        result = loads(result)
+
+        self.assertDictEqual(result, {'abc': 123, 'now': '2022-11-22T01:02:03', 'raw': 'zxc'})
+
+        # The input dict must have been left as it was
+        self.assertIs(data['now'], now)
+        self.assertEqual(data['raw'], b'zxc')
+
+# ################################################################################################################################
+
+    def test_dumps_not_a_dict(self):
+
+        self.assertEqual(loads(dumps(b'zxc')), 'zxc')
+        self.assertEqual(loads(dumps(datetime(2022, 11, 22, 1, 2, 3))), '2022-11-22T01:02:03')
+        self.assertEqual(loads(dumps([1, b'2', {3}])), [1, '2', [3]])
+        self.assertEqual(loads(dumps(None)), None)
+
+# ################################################################################################################################
+
+    def test_dumps_no_indent(self):
+        self.assertEqual(dumps({'abc': [1, 2]}, indent=0), '{"abc":[1,2]}')
+
+# ################################################################################################################################
+
+    def test_dumps_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            dumps({'abc': object()})
+
+        # Values that cannot be serialized are rejected at any level of nesting
+        with self.assertRaises(TypeError):
+            dumps({'abc': [{'zxc': object()}]})
+
+# ################################################################################################################################
+
+    def test_dumps_nested(self):
+
+        data = {
+            'abc': [
+                {'now': datetime(2022, 11, 22, 1, 2, 3), 'raw': b'zxc'},
+                (Decimal('1.25'), {'qwe'}),
+            ]
+        }
+
+        # Values nested in containers are converted the same way top-level ones are
+        self.assertEqual(
+            dumps(data, indent=0), '{"abc":[{"now":"2022-11-22T01:02:03","raw":"zxc"},[1.25,["qwe"]]]}')
+
+# ################################################################################################################################
+
+    def test_dumps_output_format(self):
+
+        # Indentation is always two spaces, non-ASCII characters are not escaped and neither are forward slashes
+        self.assertEqual(dumps({'abc': ['zażółć', 'a/b']}), '{\n  "abc": [\n    "zażółć",\n    "a/b"\n  ]\n}')
+        self.assertEqual(dumps({'abc': 1}, indent=4), dumps({'abc': 1}, indent=2))
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+if __name__ == '__main__':
+    main()
+
+# ################################################################################################################################
+# ################################################################################################################################
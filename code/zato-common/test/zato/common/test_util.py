@@ -8,9 +8,13 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 
 # stdlib
 import os
+import select
+import sys
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from unittest import TestCase
+from threading import Timer
+from unittest import skipUnless, TestCase
 
 # Bunch
 from bunch import Bunch
@@ -18,8 +22,13 @@ from bunch import Bunch
 # lxml
 from lxml import etree
 
+# mock
+from mock import patch
+
 # Zato
 from zato.common.util import api as util_api, StaticConfig
+from zato.common.util import file_system
+from zato.common.util.file_system import fs_safe_name, fs_safe_now
 from zato.common.util.search import SearchResults
 from zato.common.py23_ import maxint
 from zato.common.test.tls_material import ca_cert
@@ -234,3 +243,107 @@ class SearchResultsTestCase(TestCase):
 
 # ################################################################################################################################
 # ################################################################################################################################
+
+class FSSafeNowTestCase(TestCase):
+
+    def test_fs_safe_now(self):
+
+        values = [
+            datetime(2021, 1, 2, 3, 4, 5),
+            datetime(2021, 1, 2, 3, 4, 5, 123),
+            datetime(2021, 1, 2, 3, 4, 6, 123, tzinfo=timezone.utc),
+            datetime(2021, 1, 2, 3, 4, 6, tzinfo=timezone.utc),
+            datetime(2021, 1, 2, 3, 4, 6, 456, tzinfo=timezone(timedelta(hours=-5, minutes=-30))),
+        ]
+
+        # The result is the same as if the whole timestamp was made safe, including microseconds and timezone offsets
+        for value in values:
+            self.assertEqual(fs_safe_now(lambda: value), fs_safe_name(value.isoformat()))
+
+        self.assertEqual(fs_safe_now(lambda: values[2]), '2021_01_02T03_04_06_000123_00_00')
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+# The same conditions that wait_for_file uses to choose its notification mechanism
+has_kqueue = hasattr(select, 'kqueue')
+has_inotify = sys.platform.startswith('linux') and not has_kqueue
+
+class WaitForFileTestCase(TestCase):
+
+    def check_file_appears(self, func):
+
+        with TemporaryDirectory() as dir_name:
+            path = os.path.join(dir_name, 'file.txt')
+
+            # The file is created only after the function starts to wait for it
+            timer = Timer(0.2, Path(path).touch)
+            timer.start()
+
+            try:
+                self.assertIs(func(path, 5), True)
+            finally:
+                timer.join()
+
+# ################################################################################################################################
+
+    def check_timeout(self, func):
+
+        with TemporaryDirectory() as dir_name:
+            path = os.path.join(dir_name, 'file.txt')
+
+            # Another file appears in the directory but not the one that is waited for
+            timer = Timer(0.1, Path(os.path.join(dir_name, 'other.txt')).touch)
+            timer.start()
+
+            try:
+                self.assertIs(func(path, 0.5), False)
+            finally:
+                timer.join()
+
+# ################################################################################################################################
+
+    def check_dir_missing(self, func):
+
+        with TemporaryDirectory() as dir_name:
+            path = os.path.join(dir_name, 'missing', 'file.txt')
+
+            # The directory cannot be watched so there is no result ..
+            self.assertIsNone(func(path, 5))
+
+            # .. which means that the file is polled for instead.
+            with patch.object(file_system, '_wait_for_file_polling') as polling:
+                file_system.wait_for_file(path, 5)
+
+            polling.assert_called_once_with(path, 5)
+
+# ################################################################################################################################
+
+    @skipUnless(has_inotify, 'Requires inotify')
+    def test_inotify_file_appears(self):
+        self.check_file_appears(file_system._wait_for_file_inotify)
+
+    @skipUnless(has_inotify, 'Requires inotify')
+    def test_inotify_timeout(self):
+        self.check_timeout(file_system._wait_for_file_inotify)
+
+    @skipUnless(has_inotify, 'Requires inotify')
+    def test_inotify_dir_missing(self):
+        self.check_dir_missing(file_system._wait_for_file_inotify)
+
+# ################################################################################################################################
+
+    @skipUnless(has_kqueue, 'Requires kqueue')
+    def test_kqueue_file_appears(self):
+        self.check_file_appears(file_system._wait_for_file_kqueue)
+
+    @skipUnless(has_kqueue, 'Requires kqueue')
+    def test_kqueue_timeout(self):
+        self.check_timeout(file_system._wait_for_file_kqueue)
+
+    @skipUnless(has_kqueue, 'Requires kqueue')
+    def test_kqueue_dir_missing(self):
+        self.check_dir_missing(file_system._wait_for_file_kqueue)
+
+# ################################################################################################################################
+# ################################################################################################################################
@@ -43,6 +43,7 @@ setup(
           Extension(name='zato.url_dispatcher',      sources=['src/zato/cy/url_dispatcher.pyx']),
           Extension(name='zato.util_convert',        sources=['src/zato/cy/util/convert.pyx']),
           Extension(name='zato.cy.wsx',              sources=['src/zato/cy/util/wsx.pyx']),
+          Extension(name='zato.cy.scheduler_',       sources=['src/zato/cy/util/scheduler_.pyx']),
         ], annotate=True, language_level=3),
 
       zip_safe = False,
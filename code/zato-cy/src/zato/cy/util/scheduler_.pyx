@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (C) Zato Source s.r.o. https://zato.io
+
+Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
+"""
+
+# stdlib
+from datetime import datetime
+
+# ciso8601
+from ciso8601 import parse_datetime
+
+# pytz
+from pytz import UTC
+
+# ################################################################################################################################
+
+cdef inline int _to_int(str data, Py_ssize_t start, Py_ssize_t stop) except? -2:
+
+    cdef Py_ssize_t idx
+    cdef Py_UCS4 char
+    cdef int out = 0
+
+    for idx in range(start, stop):
+        char = data[idx]
+        if char < u'0' or char > u'9':
+            return -1
+        out = out * 10 + <int>(char - u'0')
+
+    return out
+
+# ################################################################################################################################
+
+cpdef object parse_start_date(str start_date):
+    """ A compiled version of zato.admin.web.views.scheduler._parse_start_date - parses start dates
+    in the exact 'YYYY-MM-DDTHH:MM:SS' layout using fixed offsets, with anything else given to ciso8601.
+    """
+    cdef int year, month, day, hour, minute, second
+
+    if len(start_date) == 19 and \
+       start_date[4] == u'-' and start_date[7] == u'-' and start_date[10] == u'T' and \
+       start_date[13] == u':' and start_date[16] == u':':
+
+        year   = _to_int(start_date, 0, 4)
+        month  = _to_int(start_date, 5, 7)
+        day    = _to_int(start_date, 8, 10)
+        hour   = _to_int(start_date, 11, 13)
+        minute = _to_int(start_date, 14, 16)
+        second = _to_int(start_date, 17, 19)
+
+        if year != -1 and month != -1 and day != -1 and hour != -1 and minute != -1 and second != -1:
+            try:
+                return datetime(year, month, day, hour, minute, second, tzinfo=UTC)
+            except ValueError:
+                pass
+
+    return parse_datetime(start_date).replace(tzinfo=UTC)
+
+# ################################################################################################################################
@@ -10,15 +10,18 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 import logging
 import os
 from datetime import datetime
+from functools import partial
 from logging import DEBUG, INFO, WARN
 from platform import system as platform_system
 from random import seed as random_seed
+from re import escape as re_escape
 from tempfile import mkstemp
 from traceback import format_exc
 from uuid import uuid4
 
 # gevent
 import gevent.monkey # Needed for Cassandra
+from gevent import joinall, spawn
 
 # Paste
 from paste.util.converters import asbool
@@ -31,7 +34,7 @@ from zato.broker import BrokerMessageReceiver
 from zato.broker.client import BrokerClient
 from zato.bunch import Bunch
 from zato.common.api import DATA_FORMAT, default_internal_modules, HotDeploy, KVDB, RATE_LIMIT, SERVER_STARTUP, \
-    SERVER_UP_STATUS, ZatoKVDB as CommonZatoKVDB, ZATO_ODB_POOL_NAME
+    SERVER_UP_STATUS, ZatoKVDB as CommonZatoKVDB, ZATO_NOT_GIVEN, ZATO_ODB_POOL_NAME
 from zato.common.audit import audit_pii
 from zato.common.audit_log import AuditLog
 from zato.common.broker_message import HOT_DEPLOY, MESSAGE_TYPE
@@ -50,7 +53,7 @@ from zato.common.util.api import absolutize, get_config, get_kvdb_config_for_log
 from zato.common.util.platform_ import is_posix
 from zato.common.util.posix_ipc_ import ConnectorConfigIPC, ServerStartupIPC
 from zato.common.util.time_ import TimeUtil
-from zato.common.util.tcp import wait_until_port_taken
+from zato.common.util.tcp import get_free_port, wait_until_port_taken
 from zato.distlock import LockManager
 from zato.server.base.worker import WorkerStore
 from zato.server.config import ConfigStore
@@ -62,10 +65,6 @@ from zato.server.base.parallel.config import ConfigLoader
 from zato.server.base.parallel.http import HTTPHandler
 from zato.server.base.parallel.subprocess_.api import CurrentState as SubprocessCurrentState, \
      StartConfig as SubprocessStartConfig
-from zato.server.base.parallel.subprocess_.ftp import FTPIPC
-from zato.server.base.parallel.subprocess_.ibm_mq import IBMMQIPC
-from zato.server.base.parallel.subprocess_.zato_events import ZatoEventsIPC
-from zato.server.base.parallel.subprocess_.outconn_sftp import SFTPIPC
 from zato.server.sso import SSOTool
 
 # ################################################################################################################################
@@ -156,6 +155,10 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.worker_store = None # type: WorkerStore
         self.service_store = None # type: ServiceStore
         self.request_dispatcher_dispatch = None
+        self._worker_store_invoke = None
+        self._pubsub_publish = None
+        self._pubsub_subscriptions_by_sub_key = None # type: dict
+        self._pubsub_topics = None # type: dict
         self.deployment_lock_expires = None # type: int
         self.deployment_lock_timeout = None # type: int
         self.deployment_key = ''
@@ -175,6 +178,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.pid = None # type: int
         self.sync_internal = None # type: bool
         self.ipc_api = IPCAPI()
+        self._ipc_invoke_by_pid = self.ipc_api.invoke_by_pid
         self.fifo_response_buffer_size = None # type: int # Will be in megabytes
         self.is_first_worker = None # type: bool
         self.shmem_size = -1.0
@@ -187,6 +191,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.startup_callable_tool = None # type: StartupCallableTool
         self.default_internal_pubsub_endpoint_id = None
         self.rate_limiting = None # type: RateLimiting
+        self._sso_rate_limit_index = {} # type: dict
         self.jwt_secret = None # type: bytes
         self._hash_secret_method = None # type: unicode
         self._hash_secret_rounds = None # type: int
@@ -196,7 +201,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.has_posix_ipc = is_posix
         self.user_config = Bunch()
         self.stderr_path = None # type: str
-        self.json_parser = SIMDJSONParser()
+        self.json_parser = SIMDJSONParser() # Shared by all requests so that its internal buffers are allocated only once
         self.work_dir = 'ParallelServer-work_dir'
         self.events_dir = 'ParallelServer-events_dir'
         self.kvdb_dir = 'ParallelServer-kvdb_dir'
@@ -236,11 +241,11 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.user_ctx = Bunch()
         self.user_ctx_lock = gevent.lock.RLock()
 
-        # Connectors
-        self.connector_ftp    = FTPIPC(self)
-        self.connector_ibm_mq = IBMMQIPC(self)
-        self.connector_sftp   = SFTPIPC(self)
-        self.connector_events = ZatoEventsIPC(self)
+        # Connectors - created on first use, see the properties below
+        self._connector_ftp    = None # type: SubprocessIPC
+        self._connector_ibm_mq = None # type: SubprocessIPC
+        self._connector_sftp   = None # type: SubprocessIPC
+        self._connector_events = None # type: SubprocessIPC
 
         # HTTP methods allowed as a Python list
         self.http_methods_allowed = []
@@ -253,13 +258,57 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.needs_access_log = self.access_logger.isEnabledFor(INFO)
         self.needs_all_access_log = True
         self.access_log_ignore = set()
-        self.has_pubsub_audit_log = logging.getLogger('zato_pubsub_audit').isEnabledFor(DEBUG)
+        self.pubsub_audit_logger = logging.getLogger('zato_pubsub_audit')
+        self.has_pubsub_audit_log = self.pubsub_audit_logger.isEnabledFor(DEBUG)
         self.is_enabled_for_warn = logging.getLogger('zato').isEnabledFor(WARN)
-        self.is_admin_enabled_for_info = logging.getLogger('zato_admin').isEnabledFor(INFO)
+        self.admin_logger = logging.getLogger('zato_admin')
+        self.is_admin_enabled_for_info = self.admin_logger.isEnabledFor(INFO)
+
+        # Checked upfront so that we do not build log messages which would be discarded anyway
+        self.is_enabled_for_debug = logger.isEnabledFor(DEBUG)
+        self.is_enabled_for_info = logger.isEnabledFor(INFO)
+        self.is_kvdb_enabled_for_info = kvdb_logger.isEnabledFor(INFO)
 
         # The main config store
         self.config = ConfigStore()
 
+# ################################################################################################################################
+
+    # Connectors - each is created only when it is needed for the first time, which for most servers
+    # means that connectors of types they do not use are never created at all.
+
+    @property
+    def connector_ftp(self):
+        # type: () -> SubprocessIPC
+        if self._connector_ftp is None:
+            from zato.server.base.parallel.subprocess_.ftp import FTPIPC
+            self._connector_ftp = FTPIPC(self)
+        return self._connector_ftp
+
+    @property
+    def connector_ibm_mq(self):
+        # type: () -> SubprocessIPC
+        if self._connector_ibm_mq is None:
+            from zato.server.base.parallel.subprocess_.ibm_mq import IBMMQIPC
+            self._connector_ibm_mq = IBMMQIPC(self)
+        return self._connector_ibm_mq
+
+    @property
+    def connector_sftp(self):
+        # type: () -> SubprocessIPC
+        if self._connector_sftp is None:
+            from zato.server.base.parallel.subprocess_.outconn_sftp import SFTPIPC
+            self._connector_sftp = SFTPIPC(self)
+        return self._connector_sftp
+
+    @property
+    def connector_events(self):
+        # type: () -> SubprocessIPC
+        if self._connector_events is None:
+            from zato.server.base.parallel.subprocess_.zato_events import ZatoEventsIPC
+            self._connector_events = ZatoEventsIPC(self)
+        return self._connector_events
+
 # ################################################################################################################################
 
     def deploy_missing_services(self, locally_deployed):
@@ -282,7 +331,8 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 
             if missing:
 
-                logger.info('Found extra services to deploy: %s', ', '.join(sorted(item.name for item in missing)))
+                if self.is_enabled_for_info:
+                    logger.info('Found extra services to deploy: %s', ', '.join(sorted(item.name for item in missing)))
 
                 # (file_name, source_path) -> a list of services it contains
                 modules = {}
@@ -290,25 +340,33 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
                 # Coalesce all service modules - it is possible that each one has multiple services
                 # so we do want to deploy the same module over for each service found.
                 for _ignored_service_id, name, source_path, source in missing:
-                    file_name = os.path.basename(source_path)
-                    _, tmp_full_path = mkstemp(suffix='-'+ file_name)
 
                     # Module names are unique so they can serve as keys
-                    key = file_name
+                    key = os.path.basename(source_path)
+                    module = modules.get(key)
+
+                    if module is None:
+
+                        # A temporary file is needed only once per module ..
+                        fd, tmp_full_path = mkstemp(suffix='-'+ key)
 
-                    if key not in modules:
                         modules[key] = {
                             'tmp_full_path': tmp_full_path,
                             'services': [name] # We can append initial name already in this 'if' branch
                         }
 
-                        # Save the source code only once here
-                        f = open(tmp_full_path, 'wb')
-                        f.write(source)
-                        f.close()
+                        # .. and we save the source code directly through the descriptor that mkstemp already opened,
+                        # without a buffered file object in between. A single write will usually suffice
+                        # but a partial one is still possible, hence the loop.
+                        try:
+                            to_write = memoryview(source)
+                            while to_write:
+                                to_write = to_write[os.write(fd, to_write):]
+                        finally:
+                            os.close(fd)
 
                     else:
-                        modules[key]['services'].append(name)
+                        module['services'].append(name)
 
                 # Create a deployment package in ODB out of which all the services will be picked up ..
                 for file_name, values in modules.items():
@@ -318,10 +376,13 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
                     msg.package_id = hot_deploy(self, file_name, values['tmp_full_path'], notify=False)
 
                     # .. and tell the worker to actually deploy all the services the package contains.
-                    # gevent.spawn(self.worker_store.on_broker_msg_HOT_DEPLOY_CREATE_SERVICE, msg)
+                    # Note that this is not done in separate greenlets - all of them would run in the same thread
+                    # and deploying a package means importing its module, yet Python's import machinery
+                    # does not expect concurrent imports from one thread.
                     self.worker_store.on_broker_msg_HOT_DEPLOY_CREATE_SERVICE(msg)
 
-                    logger.info('Deployed extra services found: %s', sorted(values['services']))
+                    if self.is_enabled_for_info:
+                        logger.info('Deployed extra services found: %s', sorted(values['services']))
 
 # ################################################################################################################################
 
@@ -372,9 +433,11 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 
             return set(locally_deployed)
 
-        lock_name = '{}{}:{}'.format(KVDB.LOCK_SERVER_STARTING, self.fs_server_config.main.token, self.deployment_key)
-        already_deployed_flag = '{}{}:{}'.format(KVDB.LOCK_SERVER_ALREADY_DEPLOYED,
-                                                 self.fs_server_config.main.token, self.deployment_key)
+        token = self.fs_server_config.main.token
+        deployment_key = self.deployment_key
+
+        lock_name = f'{KVDB.LOCK_SERVER_STARTING}{token}:{deployment_key}'
+        already_deployed_flag = f'{KVDB.LOCK_SERVER_ALREADY_DEPLOYED}{token}:{deployment_key}'
 
         logger.debug('Will use the lock_name: `%s`', lock_name)
 
@@ -406,9 +469,11 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
                 # time is more than a century in the future. It will be cleared out
                 # next time the server will be started.
 
+                # The value has a fixed structure and an ISO-8601 timestamp never needs escaping,
+                # which is why we can build its JSON form directly.
                 self.kv_data_api.set(
                     already_deployed_flag,
-                    dumps({'create_time_utc':datetime.utcnow().isoformat()}),
+                    '{"create_time_utc":"%s"}' % datetime.utcnow().isoformat(),
                     self.deployment_lock_expires,
                 )
 
@@ -441,33 +506,37 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.static_config.read_directory(os.path.join(self.static_dir, 'sso', 'email'))
 
         # Key-value DB
-        kvdb_config = get_kvdb_config_for_log(self.fs_server_config.kvdb)
-        kvdb_logger.info('Worker config `%s`', kvdb_config)
+        if self.is_kvdb_enabled_for_info:
+            kvdb_config = get_kvdb_config_for_log(self.fs_server_config.kvdb)
+            kvdb_logger.info('Worker config `%s`', kvdb_config)
 
         self.kvdb.config = self.fs_server_config.kvdb
         self.kvdb.server = self
         self.kvdb.decrypt_func = self.crypto_manager.decrypt
 
-        kvdb_logger.info('Worker config `%s`', kvdb_config)
+        if self.is_kvdb_enabled_for_info:
+            kvdb_logger.info('Worker config `%s`', kvdb_config)
 
         if self.fs_server_config.kvdb.host:
             self.kvdb.init()
 
+        fs_misc_config = self.fs_server_config.misc
+
         # New in 3.1, it may be missing in the config file
-        if not self.fs_server_config.misc.get('sftp_genkey_command'):
-            self.fs_server_config.misc.sftp_genkey_command = 'dropbearkey'
+        if not fs_misc_config.get('sftp_genkey_command'):
+            fs_misc_config.sftp_genkey_command = 'dropbearkey'
 
         # New in 3.2, may be missing in the config file
-        allow_internal = self.fs_server_config.misc.get('service_invoker_allow_internal', [])
+        allow_internal = fs_misc_config.get('service_invoker_allow_internal', [])
         allow_internal = allow_internal if isinstance(allow_internal, list) else [allow_internal]
-        self.fs_server_config.misc.service_invoker_allow_internal = allow_internal
+        fs_misc_config.service_invoker_allow_internal = allow_internal
+
+        # Service sources from server.conf - the file is read in one go and closed right after that
+        with open(os.path.join(self.repo_location, self.fs_server_config.main.service_sources)) as f:
+            service_sources = f.read().splitlines()
 
-        # Service sources from server.conf
-        for name in open(os.path.join(self.repo_location, self.fs_server_config.main.service_sources)):
-            name = name.strip()
-            if name and not name.startswith('#'):
-                name = _normalise_service_source_path(name)
-                self.service_sources.append(name)
+        self.service_sources.extend(_normalise_service_source_path(name) for name in (
+            name.strip() for name in service_sources) if name and not name.startswith('#'))
 
         # Service sources from user-defined hot-deployment configuration
         for key, value in self.pickup_config.items():
@@ -478,16 +547,19 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
                     self.service_sources.append(pickup_from)
 
         # User-config from ./config/repo/user-config
-        for file_name in os.listdir(self.user_conf_location):
-            conf = get_config(self.user_conf_location, file_name)
+        with os.scandir(self.user_conf_location) as user_conf_entries:
+            user_conf_file_names = [entry.name for entry in user_conf_entries if entry.is_file()]
 
-            # Not used at all in this type of configuration
-            conf.pop('user_config_items', None)
+        for file_name in user_conf_file_names:
+
+            # User config items are not used at all in this type of configuration,
+            # so there is no need to look them up and parse them only to discard them.
+            conf = get_config(self.user_conf_location, file_name, needs_user_config=False)
 
             self.user_config[get_user_config_name(file_name)] = conf
 
         # Convert size of FIFO response buffers to megabytes
-        self.fifo_response_buffer_size = int(float(self.fs_server_config.misc.fifo_response_buffer_size) * megabyte)
+        self.fifo_response_buffer_size = int(float(fs_misc_config.fifo_response_buffer_size) * megabyte)
 
         locally_deployed = self.maybe_on_first_worker(server)
 
@@ -531,17 +603,25 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         # Easier to type
         self = parallel_server # type: ParallelServer
 
+        # Config sections that we refer to a lot below
+        fs_server_config = self.fs_server_config
+        fs_main_config = fs_server_config.main
+        fs_misc_config = fs_server_config.misc
+        fs_hot_deploy_config = fs_server_config.hot_deploy
+
         # This cannot be done in __init__ because each sub-process obviously has its own PID
         self.pid = os.getpid()
 
         # This also cannot be done in __init__ which doesn't have this variable yet
         self.is_first_worker = int(os.environ['ZATO_SERVER_WORKER_IDX']) == 0
 
-        # Used later on
-        use_tls = asbool(self.fs_server_config.crypto.use_tls)
+        # Used later on - the flags are converted to booleans once and stored back in the config
+        # so that no other reader of the same config needs to parse them again.
+        use_tls = fs_server_config.crypto.use_tls = asbool(fs_server_config.crypto.use_tls)
+        fs_misc_config.enforce_service_invokes = asbool(fs_misc_config.enforce_service_invokes)
 
         # This changed in 3.2 so we need to take both into account
-        self.work_dir = self.fs_server_config.main.get('work_dir') or self.fs_server_config.hot_deploy.get('work_dir')
+        self.work_dir = fs_main_config.get('work_dir') or fs_hot_deploy_config.get('work_dir')
         self.work_dir = os.path.normpath(os.path.join(self.repo_location, self.work_dir))
 
         # Make sure the directories for events exists
@@ -549,15 +629,18 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 
         for name in 'v1', 'v2':
             full_path = os.path.join(self.work_dir, 'events', name)
-            if not os.path.exists(full_path):
-                os.makedirs(full_path, mode=0o770, exist_ok=True)
+            os.makedirs(full_path, mode=0o770, exist_ok=True)
 
         # Set for later use - this is the version that we currently employ and we know that it exists.
         self.events_dir = events_dir_v1
 
+        # Random parts of the deployment key and of the lock name used to confirm that locking works,
+        # read from the OS in one go.
+        random_bytes = os.urandom(32)
+
         # Will be None if we are not running in background.
         if not zato_deployment_key:
-            zato_deployment_key = '{}.{}'.format(datetime.utcnow().isoformat(), uuid4().hex)
+            zato_deployment_key = '{}.{}'.format(datetime.utcnow().isoformat(), random_bytes[:16].hex())
 
         # Each time a server starts a new deployment key is generated to uniquely
         # identify this particular time the server is running.
@@ -571,15 +654,15 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.set_up_zato_kvdb()
 
         # Find out if we are on a platform that can handle our posix_ipc
-        _skip_platform = self.fs_server_config.misc.get('posix_ipc_skip_platform')
+        _skip_platform = fs_misc_config.get('posix_ipc_skip_platform')
         _skip_platform = _skip_platform if isinstance(_skip_platform, list) else [_skip_platform]
         _skip_platform = [elem for elem in _skip_platform if elem]
-        self.fs_server_config.misc.posix_ipc_skip_platform = _skip_platform
+        fs_misc_config.posix_ipc_skip_platform = _skip_platform
 
         # Create all POSIX IPC objects now that we have the deployment key,
         # but only if our platform allows it.
         if self.has_posix_ipc:
-            self.shmem_size = int(float(self.fs_server_config.shmem.size) * 10**6) # Convert to megabytes as integer
+            self.shmem_size = int(float(fs_server_config.shmem.size) * 10**6) # Convert to megabytes as integer
             self.server_startup_ipc.create(self.deployment_key, self.shmem_size)
             self.connector_config_ipc.create(self.deployment_key, self.shmem_size)
         else:
@@ -608,7 +691,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.zato_lock_manager = LockManager(backend_type, 'zato', self.odb.session)
 
         # Just to make sure distributed locking is configured correctly
-        with self.zato_lock_manager(uuid4().hex):
+        with self.zato_lock_manager(random_bytes[16:].hex()):
             pass
 
         # Basic metadata
@@ -617,7 +700,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.cluster = self.odb.cluster
         self.cluster_id = self.cluster.id
         self.cluster_name = self.cluster.name
-        self.worker_id = '{}.{}.{}.{}'.format(self.cluster_id, self.id, self.worker_pid, new_cid())
+        self.worker_id = f'{self.cluster_id}.{self.id}.{self.worker_pid}.{new_cid()}'
 
         # SQL post-processing
         ODBPostProcess(self.odb.session(), None, self.cluster_id).run()
@@ -626,7 +709,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         self.kv_data_api = KVDataAPI(self.cluster_id, self.odb)
 
         # Looked up upfront here and assigned to services in their store
-        self.enforce_service_invokes = asbool(self.fs_server_config.misc.enforce_service_invokes)
+        self.enforce_service_invokes = fs_misc_config.enforce_service_invokes
 
         # For server-to-server RPC
         self.rpc = self.build_server_rpc()
@@ -636,37 +719,46 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
             self.name, self.cluster_name, self.pid, 's' if use_tls else '', self.preferred_address, self.port)
 
         # Configure which HTTP methods can be invoked via REST or SOAP channels
-        methods_allowed = self.fs_server_config.http.methods_allowed
+        methods_allowed = fs_server_config.http.methods_allowed
         methods_allowed = methods_allowed if isinstance(methods_allowed, list) else [methods_allowed]
         self.http_methods_allowed.extend(methods_allowed)
 
-        # As above, as a regular expression to be used in pattern matching
-        http_methods_allowed_re = '|'.join(self.http_methods_allowed)
+        # As above, as a regular expression to be used in pattern matching. Note that this is a string, not a compiled object,
+        # because it becomes part of each channel's match target, which is then compiled only once, when the channel is created.
+        http_methods_allowed_re = '|'.join(re_escape(elem) for elem in self.http_methods_allowed)
         self.http_methods_allowed_re = '({})'.format(http_methods_allowed_re)
 
         # Reads in all configuration from ODB
         self.worker_store = WorkerStore(self.config, self)
-        self.worker_store.invoke_matcher.read_config(self.fs_server_config.invoke_patterns_allowed)
-        self.worker_store.target_matcher.read_config(self.fs_server_config.invoke_target_patterns_allowed)
+
+        # These are needed each time a service is invoked or a message is published or delivered.
+        # Neither the worker store nor its pub/sub object are ever replaced so they can be looked up once here.
+        self._worker_store_invoke = self.worker_store.invoke
+        self._pubsub_publish = self.worker_store.pubsub.publish
+        self._pubsub_subscriptions_by_sub_key = self.worker_store.pubsub.subscriptions_by_sub_key
+        self._pubsub_topics = self.worker_store.pubsub.topics
+
+        self.worker_store.invoke_matcher.read_config(fs_server_config.invoke_patterns_allowed)
+        self.worker_store.target_matcher.read_config(fs_server_config.invoke_target_patterns_allowed)
         self.set_up_config(server)
 
         # Normalize hot-deploy configuration
         self.hot_deploy_config = Bunch()
-        self.hot_deploy_config.pickup_dir = absolutize(self.fs_server_config.hot_deploy.pickup_dir, self.repo_location)
+        self.hot_deploy_config.pickup_dir = absolutize(fs_hot_deploy_config.pickup_dir, self.repo_location)
         self.hot_deploy_config.work_dir = self.work_dir
-        self.hot_deploy_config.backup_history = int(self.fs_server_config.hot_deploy.backup_history)
-        self.hot_deploy_config.backup_format = self.fs_server_config.hot_deploy.backup_format
+        self.hot_deploy_config.backup_history = int(fs_hot_deploy_config.backup_history)
+        self.hot_deploy_config.backup_format = fs_hot_deploy_config.backup_format
 
         # The first name was used prior to v3.2, note pick_up vs. pickup
-        if 'delete_after_pick_up':
-            delete_after_pickup = self.fs_server_config.hot_deploy.get('delete_after_pick_up')
+        if 'delete_after_pick_up' in fs_hot_deploy_config:
+            delete_after_pickup = fs_hot_deploy_config.get('delete_after_pick_up', True)
         else:
-            delete_after_pickup = self.fs_server_config.hot_deploy.get('delete_after_pickup')
+            delete_after_pickup = fs_hot_deploy_config.get('delete_after_pickup', True)
 
-        self.hot_deploy_config.delete_after_pickup = delete_after_pickup
+        self.hot_deploy_config.delete_after_pickup = asbool(delete_after_pickup)
 
         # Added in 3.1, hence optional
-        max_batch_size = int(self.fs_server_config.hot_deploy.get('max_batch_size', 1000))
+        max_batch_size = int(fs_hot_deploy_config.get('max_batch_size', 1000))
 
         # Turn it into megabytes
         max_batch_size = max_batch_size * 1000
@@ -706,26 +798,12 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         salt_size = self.sso_config.hash_secret.salt_size
         self.crypto_manager.add_hash_scheme('zato.default', self.sso_config.hash_secret.rounds, salt_size)
 
-        for name in('current_work_dir', 'backup_work_dir', 'last_backup_work_dir', 'delete_after_pickup'):
+        # Note that delete_after_pickup was already set above
+        hot_deploy_work_dir = self.hot_deploy_config.work_dir
+        for name in ('current_work_dir', 'backup_work_dir', 'last_backup_work_dir'):
+            self.hot_deploy_config[name] = os.path.normpath(os.path.join(hot_deploy_work_dir, fs_hot_deploy_config[name]))
 
-            # New in 2.0
-            if name == 'delete_after_pickup':
-
-                # For backward compatibility, we need to support both names
-                old_name = 'delete_after_pick_up'
-
-                if old_name in self.fs_server_config.hot_deploy:
-                    _name = old_name
-                else:
-                    _name = name
-
-                value = asbool(self.fs_server_config.hot_deploy.get(_name, True))
-                self.hot_deploy_config[name] = value
-            else:
-                self.hot_deploy_config[name] = os.path.normpath(os.path.join(
-                    self.hot_deploy_config.work_dir, self.fs_server_config.hot_deploy[name]))
-
-        self.broker_client = BrokerClient(self.rpc, self.fs_server_config.scheduler)
+        self.broker_client = BrokerClient(self.rpc, fs_server_config.scheduler)
         self.worker_store.set_broker_client(self.broker_client)
 
         self._after_init_accepted(locally_deployed)
@@ -734,7 +812,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 
         # These flags are needed if we are the first worker or not
         has_ibm_mq = bool(self.worker_store.worker_config.definition_wmq.keys()) \
-            and self.fs_server_config.component_enabled.ibm_mq
+            and fs_server_config.component_enabled.ibm_mq
 
         has_sftp = bool(self.worker_store.worker_config.out_sftp.keys())
 
@@ -745,14 +823,17 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         # Directories for SSH keys used by SFTP channels
         self.sftp_channel_dir = os.path.join(self.repo_location, 'sftp', 'channel')
 
+        # The same arguments are given to startup callables in each of the phases below
+        startup_callable_kwargs = {
+            'server': self,
+        }
+
         # This is the first process
         if self.is_starting_first:
 
             logger.info('First worker of `%s` is %s', self.name, self.pid)
 
-            self.startup_callable_tool.invoke(SERVER_STARTUP.PHASE.IN_PROCESS_FIRST, kwargs={
-                'server': self,
-            })
+            self.startup_callable_tool.invoke(SERVER_STARTUP.PHASE.IN_PROCESS_FIRST, kwargs=startup_callable_kwargs)
 
             # Clean up any old WSX connections possibly registered for this server
             # which may be still lingering around, for instance, if the server was previously
@@ -767,14 +848,11 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
                 self.init_subprocess_connectors(subprocess_start_config)
 
             # SFTP channels are new in 3.1 and the directories may not exist
-            if not os.path.exists(self.sftp_channel_dir):
-                os.makedirs(self.sftp_channel_dir)
+            os.makedirs(self.sftp_channel_dir, exist_ok=True)
 
         # These are subsequent processes
         else:
-            self.startup_callable_tool.invoke(SERVER_STARTUP.PHASE.IN_PROCESS_OTHER, kwargs={
-                'server': self,
-            })
+            self.startup_callable_tool.invoke(SERVER_STARTUP.PHASE.IN_PROCESS_OTHER, kwargs=startup_callable_kwargs)
 
             if self.has_posix_ipc:
                 self._populate_connector_config(subprocess_start_config)
@@ -787,16 +865,14 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         if is_posix:
             spawn_greenlet(self.ipc_api.run)
 
-            events_config = self.connector_config_ipc.get_config(ZatoEventsIPC.ipc_config_name, as_dict=True) # type: dict
+            events_config = self.connector_config_ipc.get_config(self.connector_events.ipc_config_name, as_dict=True) # type: dict
             events_tcp_port = events_config['port']
 
             # Statistics
             self._run_stats_client(events_tcp_port)
 
         # Invoke startup callables
-        self.startup_callable_tool.invoke(SERVER_STARTUP.PHASE.AFTER_STARTED, kwargs={
-            'server': self,
-        })
+        self.startup_callable_tool.invoke(SERVER_STARTUP.PHASE.AFTER_STARTED, kwargs=startup_callable_kwargs)
 
         logger.info('Started `%s@%s` (pid: %s)', server.name, server.cluster.name, self.pid)
 
@@ -808,52 +884,64 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         """
         # type: (SubprocessStartConfig)
 
-        ipc_config_name_to_enabled = {
-            IBMMQIPC.ipc_config_name: config.has_ibm_mq,
-            SFTPIPC.ipc_config_name: config.has_sftp,
-            ZatoEventsIPC.ipc_config_name: True,
-        }
+        # Optional connectors are accessed only if they are enabled, which is also when their IPC objects are created ..
+        connectors = [] # type: list
 
-        for ipc_config_name, is_enabled in ipc_config_name_to_enabled.items():
-            if is_enabled:
-                response = self.connector_config_ipc.get_config(ipc_config_name)
-                if response:
-                    response = loads(response)
-                    connector_suffix = ipc_config_name.replace('zato-', '').replace('-', '_')
-                    connector_attr = 'connector_{}'.format(connector_suffix)
-                    connector = getattr(self, connector_attr) # type: SubprocessIPC
-                    connector.ipc_tcp_port = response['port']
+        if config.has_ibm_mq:
+            connectors.append(self.connector_ibm_mq)
+
+        if config.has_sftp:
+            connectors.append(self.connector_sftp)
+
+        # .. whereas Zato events connector is always enabled.
+        connectors.append(self.connector_events)
+
+        for connector in connectors: # type: SubprocessIPC
+            response = self.connector_config_ipc.get_config(connector.ipc_config_name)
+            if response:
+                response = loads(response)
+                connector.ipc_tcp_port = response['port']
 
 # ################################################################################################################################
 
-    def init_subprocess_connectors(self, config):
-        """ Sets up subprocess-based connectors.
+    def _start_ibm_mq_connector(self, ipc_tcp_start_port):
+        """ Starts the IBM MQ connector and creates all of its initial objects.
         """
-        # type: (SubprocessStartConfig)
+        # type: (int) -> None
 
-        # Common
-        ipc_tcp_start_port = int(self.fs_server_config.misc.get('ipc_tcp_start_port', 34567))
+        # Will block for a few seconds at most, until is_ok is returned
+        # which indicates that a connector started or not.
+        try:
+            if self.connector_ibm_mq.start_ibm_mq_connector(ipc_tcp_start_port):
+                self.connector_ibm_mq.create_initial_wmq_definitions(self.worker_store.worker_config.definition_wmq)
+                self.connector_ibm_mq.create_initial_wmq_outconns(self.worker_store.worker_config.out_wmq)
+                self.connector_ibm_mq.create_initial_wmq_channels(self.worker_store.worker_config.channel_wmq)
+        except Exception as e:
+            logger.warning('Could not create initial IBM MQ objects, e:`%s`', e)
+        else:
+            self.subproc_current_state.is_ibm_mq_running = True
 
-        # IBM MQ
-        if config.has_ibm_mq:
+# ################################################################################################################################
 
-            # Will block for a few seconds at most, until is_ok is returned
-            # which indicates that a connector started or not.
-            try:
-                if self.connector_ibm_mq.start_ibm_mq_connector(ipc_tcp_start_port):
-                    self.connector_ibm_mq.create_initial_wmq_definitions(self.worker_store.worker_config.definition_wmq)
-                    self.connector_ibm_mq.create_initial_wmq_outconns(self.worker_store.worker_config.out_wmq)
-                    self.connector_ibm_mq.create_initial_wmq_channels(self.worker_store.worker_config.channel_wmq)
-            except Exception as e:
-                logger.warning('Could not create initial IBM MQ objects, e:`%s`', e)
-            else:
-                self.subproc_current_state.is_ibm_mq_running = True
+    def _start_sftp_connector(self, ipc_tcp_start_port):
+        """ Starts the SFTP connector and creates all of its initial objects.
+        """
+        # type: (int) -> None
 
-        # SFTP
-        if config.has_sftp and self.connector_sftp.start_sftp_connector(ipc_tcp_start_port):
+        if self.connector_sftp.start_sftp_connector(ipc_tcp_start_port):
             self.connector_sftp.create_initial_sftp_outconns(self.worker_store.worker_config.out_sftp)
             self.subproc_current_state.is_sftp_running = True
 
+# ################################################################################################################################
+
+    def init_subprocess_connectors(self, config):
+        """ Sets up subprocess-based connectors.
+        """
+        # type: (SubprocessStartConfig)
+
+        # Common
+        ipc_tcp_start_port = int(self.fs_server_config.misc.get('ipc_tcp_start_port', 34567))
+
         # Prepare Zato events configuration
         events_config = self.fs_server_config.get('events') or {} # type: dict
 
@@ -877,8 +965,30 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
             'sync_interval': EventsDefault.sync_interval,
         }
 
+        # Each connector waits for its subprocess to start so all of them are started concurrently below. Their ports
+        # are not taken until the subprocesses bind to them which is why each connector receives its own free port
+        # to start from here - otherwise, all of them could have picked the same one.
+        to_start = []
+
+        # IBM MQ
+        if config.has_ibm_mq:
+            to_start.append(self._start_ibm_mq_connector)
+
+        # SFTP
+        if config.has_sftp:
+            to_start.append(self._start_sftp_connector)
+
         # Zato events connector always starts
-        self.connector_events.start_zato_events_connector(ipc_tcp_start_port, extra_options_kwargs=extra_options_kwargs)
+        to_start.append(partial(self.connector_events.start_zato_events_connector, extra_options_kwargs=extra_options_kwargs))
+
+        greenlets = []
+        for func in to_start:
+            port = get_free_port(ipc_tcp_start_port)
+            greenlets.append(spawn(func, port))
+            ipc_tcp_start_port = port + 1
+
+        # Errors are raised as they would be had the connectors been started one by one
+        joinall(greenlets, raise_error=True)
 
         # Wait until the events connector started - this will let other parts
         # of the server assume that it is always available.
@@ -887,8 +997,29 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 # ################################################################################################################################
 
     def set_up_sso_rate_limiting(self):
-        for item in self.odb.get_sso_user_rate_limiting_info():
-            self._create_sso_user_rate_limiting(item.user_id, True, item.rate_limit_def)
+
+        # There are no SSO users to look up if SSO is not enabled at all
+        if not self.is_sso_enabled:
+            return
+
+        # We only build an index of user IDs to their definitions here - the actual rate-limiting objects
+        # will be created on first use in ensure_sso_user_rate_limiting because most users will never
+        # be accessed during the lifetime of a given process.
+        self._sso_rate_limit_index = {
+            item.user_id: item.rate_limit_def for item in self.odb.get_sso_user_rate_limiting_info()
+        }
+
+# ################################################################################################################################
+
+    def ensure_sso_user_rate_limiting(self, user_id, _not_given=ZATO_NOT_GIVEN):
+        # type: (str, bytes) -> None
+
+        # Popping the definition out of the index means that it will be created at most once for each user ..
+        rate_limit_def = self._sso_rate_limit_index.pop(user_id, _not_given)
+
+        # .. and if it was in the index, it has not been created yet so we can do it now.
+        if rate_limit_def is not _not_given:
+            self._create_sso_user_rate_limiting(user_id, True, rate_limit_def)
 
 # ################################################################################################################################
 
@@ -957,50 +1088,80 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         """
         return self.worker_store.cache_api.get_cache(cache_type, cache_name).set(key, value)
 
+# ################################################################################################################################
+
+    def _invoke_pid(self, service, request, pid, timeout, *args, **kwargs):
+        """ Invokes a given service in a single process, returning a response dict for invoke_all_pids.
+        """
+        response = {
+            'is_ok': False,
+            'pid_data': None,
+            'error_info': None
+        }
+
+        try:
+            is_ok, pid_data = self.invoke_by_pid(service, request, pid, timeout=timeout, *args, **kwargs)
+            response['is_ok'] = is_ok
+            response['pid_data' if is_ok else 'error_info'] = pid_data
+
+        except Exception:
+            e = format_exc()
+            response['error_info'] = e
+
+        return response
+
 # ################################################################################################################################
 
     def invoke_all_pids(self, service, request, timeout=5, *args, **kwargs):
         """ Invokes a given service in each of processes current server has.
         """
-        try:
-            # PID -> response from that process
-            out = {}
+        # PID -> response from that process
+        out = {}
 
-            # Get all current PIDs
+        # Get all current PIDs
+        try:
             data = self.invoke('zato.info.get-worker-pids', serialize=False).getvalue(False)
             pids = data['response']['pids']
+        except Exception:
+            logger.warning('PID invocation error `%s`', format_exc())
+            return out
+
+        # Nothing to invoke
+        if not pids:
+            return out
+
+        # Underlying IPC needs strings on input instead of None
+        request = request or ''
 
-            # Underlying IPC needs strings on input instead of None
-            request = request or ''
+        # Each invocation spends most of its time waiting for its FIFO so we invoke all the PIDs
+        # concurrently, which means that we wait as long as the slowest process rather than for all of them in turn ..
+        greenlets = {}
+        for pid in pids:
+            greenlets[pid] = spawn(self._invoke_pid, service, request, pid, timeout, *args, **kwargs)
 
-            for pid in pids:
+        # .. invocations time out on their own but we still do not want to wait indefinitely ..
+        joinall(greenlets.values(), timeout=timeout + 1)
+
+        # .. and now we can collect the responses.
+        for pid, greenlet in greenlets.items():
+            if greenlet.successful():
+                response = greenlet.value
+            else:
                 response = {
                     'is_ok': False,
                     'pid_data': None,
-                    'error_info': None
+                    'error_info': 'No response from PID `{}` in {}s'.format(pid, timeout)
                 }
+            out[pid] = response
 
-                try:
-                    is_ok, pid_data = self.invoke_by_pid(service, request, pid, timeout=timeout, *args, **kwargs)
-                    response['is_ok'] = is_ok
-                    response['pid_data' if is_ok else 'error_info'] = pid_data
-
-                except Exception:
-                    e = format_exc()
-                    response['error_info'] = e
-                finally:
-                    out[pid] = response
-        except Exception:
-            logger.warning('PID invocation error `%s`', format_exc())
-        finally:
-            return out
+        return out
 
 # ################################################################################################################################
 
     def invoke_by_pid(self, service, request, target_pid, *args, **kwargs):
         """ Invokes a service in a worker process by the latter's PID.
         """
-        return self.ipc_api.invoke_by_pid(service, request, self.cluster_name, self.name, target_pid,
+        return self._ipc_invoke_by_pid(service, request, self.cluster_name, self.name, target_pid,
             self.fifo_response_buffer_size, *args, **kwargs)
 
 # ################################################################################################################################
@@ -1014,10 +1175,12 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
             # This cannot be used by self.invoke_by_pid
             data_format = kwargs.pop('data_format', None)
 
-            _, data = self.invoke_by_pid(service, request, target_pid, *args, **kwargs)
+            # Call IPC directly rather than through self.invoke_by_pid to save a frame on each cross-PID invocation
+            _, data = self._ipc_invoke_by_pid(service, request, self.cluster_name, self.name, target_pid,
+                self.fifo_response_buffer_size, *args, **kwargs)
             return dumps(data) if data_format == DATA_FORMAT.JSON else data
         else:
-            return self.worker_store.invoke(
+            return self._worker_store_invoke(
                 service, request,
                 data_format=kwargs.pop('data_format', DATA_FORMAT.DICT),
                 serialize=kwargs.pop('serialize', True),
@@ -1026,14 +1189,14 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 # ################################################################################################################################
 
     def publish(self, *args:'any_', **kwargs:'any_') -> 'any_':
-        return self.worker_store.pubsub.publish(*args, **kwargs)
+        return self._pubsub_publish(*args, **kwargs)
 
 # ################################################################################################################################
 
     def invoke_async(self, service, request, callback, *args, **kwargs):
         """ Invokes a service in background.
         """
-        return self.worker_store.invoke(service, request, is_async=True, callback=callback, *args, **kwargs)
+        return self._worker_store_invoke(service, request, is_async=True, callback=callback, *args, **kwargs)
 
 # ################################################################################################################################
 
@@ -1062,8 +1225,8 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
     def deliver_pubsub_msg(self, msg):
         """ A callback method invoked by pub/sub delivery tasks for each messages that is to be delivered.
         """
-        subscription = self.worker_store.pubsub.subscriptions_by_sub_key[msg.sub_key]
-        topic = self.worker_store.pubsub.topics[subscription.config.topic_id]
+        subscription = self._pubsub_subscriptions_by_sub_key[msg.sub_key]
+        topic = self._pubsub_topics[subscription.config.topic_id]
 
         if topic.before_delivery_hook_service_invoker:
             response = topic.before_delivery_hook_service_invoker(topic, msg)
@@ -1080,8 +1243,15 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         if data:
             data = data.encode('utf8') if isinstance(data, unicode) else data
             encrypted = self.crypto_manager.encrypt(data)
-            encrypted = encrypted.decode('utf8')
-            return '{}{}'.format(prefix, encrypted)
+            return prefix + encrypted.decode('utf8')
+
+# ################################################################################################################################
+
+    def encrypt_bytes(self, data:'any_', prefix:'bytes'=SECRETS.PREFIX_BYTES) -> 'bytes':
+        """ Returns data encrypted using server's CryptoManager as bytes, without decoding it to a string.
+        """
+        if data:
+            return prefix + self.crypto_manager.encrypt(data)
 
 # ################################################################################################################################
 
@@ -1095,17 +1265,30 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 
 # ################################################################################################################################
 
-    def decrypt(self, data, _prefix=SECRETS.PREFIX, _marker=SECRETS.EncryptedMarker):
+    def decrypt(self, data, _prefix=SECRETS.PREFIX, _prefix_bytes=SECRETS.PREFIX_BYTES, _prefix_len=len(SECRETS.PREFIX),
+        _marker=SECRETS.EncryptedMarker, _marker_bytes=SECRETS.EncryptedMarkerBytes):
         """ Returns data decrypted using server's CryptoManager.
         """
 
+        # CryptoManager works with bytes anyway so there is no need to decode them here ..
         if isinstance(data, bytes):
-            data = data.decode('utf8')
+            prefix = _prefix_bytes
+            marker = _marker_bytes
+        else:
+            prefix = _prefix
+            marker = _marker
+
+        # .. we know the length of the prefix so there is no need to search the whole of data for it ..
+        if data.startswith(prefix):
+            return self.decrypt_no_prefix(data[_prefix_len:])
+
+        # .. whereas the marker is the beginning of an encrypted token, which is why it is not removed.
+        elif data.startswith(marker):
+            return self.decrypt_no_prefix(data)
 
-        if data.startswith((_prefix, _marker)):
-            return self.decrypt_no_prefix(data.replace(_prefix, '', 1))
         else:
-            return data # Already decrypted, return as is
+            # Already decrypted, return as is
+            return data.decode('utf8') if isinstance(data, bytes) else data
 
 # ################################################################################################################################
 
@@ -1118,8 +1301,7 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
 
         self.kvdb_dir = os.path.join(self.work_dir, 'kvdb', 'v10')
 
-        if not os.path.exists(self.kvdb_dir):
-            os.makedirs(self.kvdb_dir, exist_ok=True)
+        os.makedirs(self.kvdb_dir, exist_ok=True)
 
         self.load_zato_kvdb_data()
 
@@ -1148,7 +1330,8 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
         )
 
         #
-        # .. and now we can load all the data.
+        # .. and now we can load all the data. Note that this is done serially on purpose - regular file I/O does not yield
+        # to other greenlets and parsing is CPU-bound, so spawning a greenlet per store would not let the loads overlap.
         #
 
         self.slow_responses.load_data()
@@ -1250,6 +1433,10 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
             else:
                 self._is_process_closing = True
 
+            # WSX connections for this server cleanup. This needs to run before SQL pools are closed,
+            # otherwise it would have to open a new connection to the ODB only to close it right afterwards.
+            self.cleanup_wsx(True)
+
             # Close SQL pools
             self.sql_pool_store.cleanup_on_stop()
 
@@ -1261,9 +1448,6 @@ class ParallelServer(BrokerMessageReceiver, ConfigLoader, HTTPHandler):
             # Close ZeroMQ-based IPC
             self.ipc_api.close()
 
-            # WSX connections for this server cleanup
-            self.cleanup_wsx(True)
-
             logger.info('Stopping server process (%s:%s) (%s)', self.name, self.pid, os.getpid())
 
 # ################################################################################################################################
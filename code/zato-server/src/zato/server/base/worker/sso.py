@@ -33,6 +33,10 @@ class SSO(WorkerImpl):
 # ################################################################################################################################
 
     def on_broker_msg_SSO_USER_EDIT(self, msg, _type=RATE_LIMIT.OBJECT_TYPE.SSO_USER):
+
+        # Rate-limiting for SSO users is created lazily so we need to make sure it exists before it can be edited
+        self.server.ensure_sso_user_rate_limiting(msg.user_id)
+
         if self.server.rate_limiting.has_config(_type, msg.user_id):
             self.server.rate_limiting.edit(_type, msg.user_id, {
                 'id': msg.user_id,
@@ -227,7 +227,8 @@ class RequestDispatcher:
         self.return_tracebacks = return_tracebacks
 
         self.default_error_message = default_error_message
-        self.http_methods_allowed = http_methods_allowed
+        # Checked for each request, hence a frozenset rather than the list that we receive on input
+        self.http_methods_allowed = frozenset(http_methods_allowed or ())
 
         # To reduce the number of attribute lookups
         self._sso_api_user = self.server.sso_api.user if self.server.sso_api else None
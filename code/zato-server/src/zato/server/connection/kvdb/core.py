@@ -9,12 +9,18 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 # stdlib
 import os
 from logging import getLogger
+from mmap import ACCESS_READ, mmap
+from tempfile import mkstemp
+
+# gevent
+from gevent import get_hub
+from gevent.lock import RLock
 
 # orjson
 from orjson import dumps as json_dumps
 
 # simdjson
-from simdjson import loads as json_loads
+from simdjson import Parser as SIMDJSONParser
 
 # Zato
 from zato.common.api import ZatoKVDB
@@ -44,17 +50,26 @@ logger = getLogger('zato')
 @dataclass(init=False)
 class ObjectCtx:
 
+    # There may be many such objects in RAM so they do not have a per-instance __dict__
+    __slots__ = ('id', 'cid', 'timestamp', 'data')
+
     # A unique identifer assigned to this event by Zato
     id: str
 
     # A correlation ID assigned by Zato - multiple events may have the same CID
-    cid: str = None
+    cid: str
 
     # Timestamp of this event, as assigned by Zato
-    timestamp: str = None
+    timestamp: str
 
     # The actual business data
-    data: object = None
+    data: object
+
+    def __init__(self):
+        # Slots cannot have class-level defaults so they are assigned here instead
+        self.cid = None
+        self.timestamp = None
+        self.data = None
 
 # ################################################################################################################################
 # ################################################################################################################################
@@ -74,6 +89,12 @@ class BaseRepo(InRAMStore):
         # Where we persist data on disk
         self.data_path = data_path
 
+        # Reused by each call to self._loads, which always runs under self.update_lock
+        self._parser = SIMDJSONParser()
+
+        # Makes sure that only one snapshot at a time is written to disk
+        self._save_lock = RLock()
+
 # ################################################################################################################################
 
     def _append(self, *args, **kwargs):
@@ -118,9 +139,9 @@ class BaseRepo(InRAMStore):
 
 # ################################################################################################################################
 
-    def append(self, *args, **kwargs):
+    def append(self, ctx):
         with self.update_lock:
-            return self._append(*args, **kwargs)
+            return self._append(ctx)
 
 # ################################################################################################################################
 
@@ -137,9 +158,19 @@ class BaseRepo(InRAMStore):
 
 # ################################################################################################################################
 
-    def set(self, *args, **kwargs):
+    def set(self, key, value):
+        with self.update_lock:
+            return self._set(key, value)
+
+# ################################################################################################################################
+
+    def set_many(self, items):
+        # type: (list) -> None
+
+        # All the key/value pairs are set under a single acquisition of the lock
         with self.update_lock:
-            return self._set(*args, **kwargs)
+            for key, value in items:
+                self._set(key, value)
 
 # ################################################################################################################################
 
@@ -149,56 +180,60 @@ class BaseRepo(InRAMStore):
 
 # ################################################################################################################################
 
-    def delete(self, *args, **kwargs):
+    def delete(self, object_id):
         with self.update_lock:
-            return self._delete(*args, **kwargs)
+            return self._delete(object_id)
 
 # ################################################################################################################################
 
-    def remove_all(self, *args, **kwargs):
+    def remove_all(self):
         with self.update_lock:
-            return self._remove_all(*args, **kwargs)
+            return self._remove_all()
 
 # ################################################################################################################################
 
-    def clear(self, *args, **kwargs):
+    def clear(self):
         with self.update_lock:
-            return self._clear(*args, **kwargs)
+            return self._clear()
 
 # ################################################################################################################################
 
-    def get_size(self, *args, **kwargs):
+    def get_size(self):
         with self.update_lock:
-            return self._get_size(*args, **kwargs)
+            return self._get_size()
 
 # ################################################################################################################################
 
-    def incr(self, key, *args, **kwargs):
+    def incr(self, key, change_by=1):
         lock = self.get_lock(key)
         with lock:
-            return self._incr(key, *args, **kwargs)
+            return self._incr(key, change_by)
 
 # ################################################################################################################################
 
-    def decr(self, key, *args, **kwargs):
+    def decr(self, key, change_by=1):
         lock = self.get_lock(key)
         with lock:
-            return self._decr(key, *args, **kwargs)
+            return self._decr(key, change_by)
 
 # ################################################################################################################################
 
     def _loads(self, data):
         # type: (bytes) -> None
-        data = json_loads(data) # type: dict
+
+        # This returns a lazy document whose elements are converted to Python objects only when they are accessed ..
+        data = self._parser.parse(data)
         if data:
 
-            # We may have already some pre-defined keys in RAM that we only need to update ..
+            # .. we may have already some pre-defined keys in RAM that we only need to update,
+            # in which case only their own values are converted ..
             if self.in_ram_store:
-                for key, value in data.items():
-                    self.in_ram_store[key].update(value)
+                for key in data.keys():
+                    self.in_ram_store[key].update(data[key].as_dict())
 
             # .. otherwise, we load all the data as is because we assume know there are no keys in RAM yet.
-            self.in_ram_store.update(data)
+            else:
+                self.in_ram_store.update(data.as_dict())
 
 # ################################################################################################################################
 
@@ -214,9 +249,13 @@ class BaseRepo(InRAMStore):
         with self.update_lock:
             if os.path.exists(self.data_path):
                 with open(self.data_path, 'rb') as f:
-                    data = f.read()
-                    if data:
-                        self._loads(data)
+
+                    # The file is mapped rather than read, which saves the copy that f.read() would make. Note that simdjson
+                    # still copies what it is given into a padded buffer of its own, so this is not a zero-copy parse.
+                    # Empty files cannot be mapped but there is nothing to load from them anyway.
+                    if os.fstat(f.fileno()).st_size:
+                        with mmap(f.fileno(), 0, access=ACCESS_READ) as data:
+                            self._loads(data)
             else:
                 logger.info('Skipping repo data path `%s` (%s)', self.data_path, self.name)
 
@@ -236,11 +275,49 @@ class BaseRepo(InRAMStore):
 # ################################################################################################################################
 
     def save_data(self):
-        # type: () -> bytes
-        with self.update_lock:
-            with open(self.data_path, 'wb') as f:
-                data = self._dumps()
-                f.write(data)
+        # type: () -> None
+
+        with self._save_lock:
+
+            # Data is written to a temporary file first which then atomically replaces the actual one,
+            # which means that the previous snapshot is left intact if we stop in the middle of writing a new one.
+            # Each save has a temporary file of its own because all the server's processes share the same directory.
+            fd, temp_path = mkstemp(dir=os.path.dirname(self.data_path), suffix='.tmp')
+            f = os.fdopen(fd, 'wb')
+
+            try:
+                with f:
+
+                    # The data is serialised under the update lock to get a consistent view of it ..
+                    with self.update_lock:
+
+                        # .. each top-level key is serialised on its own so that only the largest of the values,
+                        # rather than the whole store, needs to be kept in RAM as JSON at any one time ..
+                        if isinstance(self.in_ram_store, dict):
+                            f.write(b'{')
+                            for idx, (key, value) in enumerate(self.in_ram_store.items()):
+                                if idx:
+                                    f.write(b',')
+
+                                # .. the outer braces are skipped through a memoryview to avoid copying the data ..
+                                f.write(memoryview(json_dumps({key: value}))[1:-1])
+                            f.write(b'}')
+
+                        # .. whereas lists are always serialised in one go.
+                        else:
+                            f.write(self._dumps())
+
+                    # Make sure the data is on disk before it replaces the previous snapshot. This does not need
+                    # the update lock and it runs in gevent's thread pool so that other greenlets are not blocked by it.
+                    f.flush()
+                    get_hub().threadpool.apply(os.fsync, (f.fileno(),))
+
+            # Do not leave a partial snapshot behind, e.g. if a value could not be serialised
+            except Exception:
+                os.unlink(temp_path)
+                raise
+
+            os.replace(temp_path, self.data_path)
 
 # ################################################################################################################################
 
@@ -262,33 +339,57 @@ class KVDB:
     def internal_create_list_repo(self, repo_name, data_path=None, max_size=1000, page_size=50):
         # type: (str) -> ListRepo
 
+        # Return an already existing repository, if there is one ..
+        repo = self.repo.get(repo_name)
+        if repo is not None:
+            return repo
+
+        # .. otherwise, create a new one. The import is done here because the module imports our own.
+
         # Zato
         from zato.server.connection.kvdb.list_ import ListRepo
 
         repo = ListRepo(repo_name, data_path, max_size, page_size)
-        return self.repo.setdefault(repo_name, repo)
+        self.repo[repo_name] = repo
+        return repo
 
 # ################################################################################################################################
 
     def internal_create_number_repo(self, repo_name, data_path=None, max_size=1000, page_size=50):
         # type: (str) -> NumberRepo
 
+        # Return an already existing repository, if there is one ..
+        repo = self.repo.get(repo_name)
+        if repo is not None:
+            return repo
+
+        # .. otherwise, create a new one. The import is done here because the module imports our own.
+
         # Zato
         from zato.server.connection.kvdb.number import NumberRepo
 
         repo = NumberRepo(repo_name, data_path, max_size, page_size)
-        return self.repo.setdefault(repo_name, repo)
+        self.repo[repo_name] = repo
+        return repo
 
 # ################################################################################################################################
 
     def internal_create_object_repo(self, repo_name, data_path=None):
         # type: (str, str) -> ObjectRepo
 
+        # Return an already existing repository, if there is one ..
+        repo = self.repo.get(repo_name)
+        if repo is not None:
+            return repo
+
+        # .. otherwise, create a new one. The import is done here because the module imports our own.
+
         # Zato
         from zato.server.connection.kvdb.object_ import ObjectRepo
 
         repo = ObjectRepo(repo_name, data_path)
-        return self.repo.setdefault(repo_name, repo)
+        self.repo[repo_name] = repo
+        return repo
 
 # ################################################################################################################################
 
@@ -79,9 +79,12 @@ class ListRepo(BaseRepo):
 
     def _delete(self, object_id):
         # type: (str) -> object
-        for item in self.in_ram_store: # type: ObjectCtx
+        for idx, item in enumerate(self.in_ram_store): # type: (int, ObjectCtx)
             if item.id == object_id:
-                self.in_ram_store.remove(item)
+
+                # We already know the index so there is no need to look the item up again with .remove,
+                # which would also compare it field by field with each preceding item.
+                del self.in_ram_store[idx]
                 return item
 
 # ################################################################################################################################
@@ -595,6 +595,9 @@ class Publish(AdminService):
             # For later use
             dt_now = datetime_from_ms(ctx.now * 1000)
 
+            # Key/value pairs to store in RAM, all in one go
+            to_set = []
+
             # This is optional
             ext_pub_time = ctx.last_msg.get('ext_pub_time')
             if ext_pub_time:
@@ -622,8 +625,8 @@ class Publish(AdminService):
                     if value:
                         topic_data[name] = value
 
-                # Store data in RAM
-                self.server.pub_sub_metadata.set(topic_key, topic_data)
+                # Data to store in RAM
+                to_set.append((topic_key, topic_data))
 
             # Prepare a request to udpate the endpoint's metadata with
             if has_endpoint:
@@ -667,8 +670,12 @@ class Publish(AdminService):
                 # Store only as many entries as configured to
                 endpoint_topic_list = endpoint_topic_list[:endpoint_max_history]
 
-                # Same as for topics, store data in RAM
-                self.server.pub_sub_metadata.set(endpoint_key, endpoint_topic_list)
+                # Same as for topics, data to store in RAM
+                to_set.append((endpoint_key, endpoint_topic_list))
+
+            # Store everything in RAM now
+            if to_set:
+                self.server.pub_sub_metadata.set_many(to_set)
 
         except Exception:
             self.logger.warning('Error while updating pub metadata `%s`', format_exc())
@@ -25,6 +25,7 @@ from zato.common.exception import ZatoException
 from zato.common.odb.model import Cluster, Job, CronStyleJob, IntervalBasedJob,\
      Service
 from zato.common.odb.query import job_by_id, job_by_name, job_list
+from zato.server.service import AsIs, Opaque
 from zato.server.service.internal import AdminService, AdminSIO, GetListAdminSIO
 
 # ################################################################################################################################
@@ -393,3 +394,75 @@ class SetActiveStatus(AdminService):
 
 # ################################################################################################################################
 # ################################################################################################################################
+
+class Batch(AdminService):
+    """ Runs a list of create, edit, delete or execute operations on scheduler jobs in a single request.
+    Operations are run in the order given, each one with its own result, so that a failure
+    of one operation does not prevent the remaining ones from running. An operation may set
+    its 'input_from' key to the index of an earlier one, e.g. an edit of a job created in the same batch,
+    in which case the ID of the job that the earlier operation returned is used as this operation's 'id'.
+    """
+    name = _service_name_prefix + 'batch'
+
+    # Maps actions that can be used in a batch to services that handle them
+    action_to_service = {
+        'create': Create.name,
+        'edit': Edit.name,
+        'delete': Delete.name,
+        'execute': Execute.name,
+    }
+
+    class SimpleIO(AdminSIO):
+        request_elem = 'zato_scheduler_job_batch_request'
+        response_elem = 'zato_scheduler_job_batch_response'
+        input_required = (Opaque('ops'),)
+        output_required = (AsIs('results'),)
+
+    def handle(self):
+
+        results = []
+
+        for idx, op in enumerate(self.request.input.ops):
+
+            # Each result points back to the operation it was produced for
+            result = {'idx': idx, 'is_ok': False}
+            results.append(result)
+
+            action = op.get('action')
+            service_name = self.action_to_service.get(action)
+
+            if not service_name:
+                result['details'] = 'Unrecognized action `{}`'.format(action)
+                continue
+
+            request = dict(op)
+            request.pop('action')
+
+            # This operation refers to a job from an earlier one, which must have succeeded for us to know its ID
+            input_from = request.pop('input_from', None)
+            if input_from is not None:
+
+                is_earlier = isinstance(input_from, int) and 0 <= input_from < idx
+                source = results[input_from] if is_earlier else None
+                job_id = source['response'].get('id') if source and source['is_ok'] else None
+
+                if not job_id:
+                    result['details'] = 'No job ID from input_from operation `{}`'.format(input_from)
+                    continue
+
+                request['id'] = job_id
+
+            try:
+                response = self.invoke(service_name, request, skip_response_elem=True)
+            except Exception:
+                details = format_exc()
+                self.logger.warning('Could not run batch operation #%s `%s`, e:`%s`', idx, action, details)
+                result['details'] = details
+            else:
+                result['is_ok'] = True
+                result['response'] = response or {}
+
+        self.response.payload.results = results
+
+# ################################################################################################################################
+# ################################################################################################################################
@@ -62,7 +62,8 @@ class SSOTool:
                 # logged in because in fact he or she is logged in, just using
                 # a security definition from sec_def.
 
-                # Check rate-limiting
+                # Check rate-limiting, creating its configuration first if this is the user's first request
+                self.server.ensure_sso_user_rate_limiting(sso_user_id)
                 self.server.rate_limiting.check_limit(cid, _rate_limit_type_sso_user,
                     sso_user_id, wsgi_environ['zato.http.remote_addr'], False)
 
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (C) 2021, Zato Source s.r.o. https://zato.io
+
+Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
+"""
+
+# stdlib
+import logging
+from unittest import main, TestCase
+
+# Bunch
+from bunch import Bunch
+
+# Zato
+from zato.common.test import rand_string
+from zato.server.service.internal.scheduler import Batch, Create, Delete, Edit, Execute
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class BatchTestCase(TestCase):
+
+    def get_service(self, ops, invoke):
+        """ Returns a Batch service with its input set to ops and its invocations of other services going through invoke.
+        """
+        # The full service environment is not needed, only what .handle uses
+        service = Batch.__new__(Batch)
+        service.logger = logging.getLogger(__name__)
+        service.request = Bunch(input=Bunch(ops=ops))
+        service.response = Bunch(payload=Bunch())
+        service.invoke = invoke
+
+        return service
+
+# ################################################################################################################################
+
+    def test_results_correlated_by_idx(self):
+
+        job_id = rand_string()
+        invoked = []
+
+        def invoke(service_name, request, skip_response_elem):
+            invoked.append((service_name, request))
+            return {'id': job_id} if service_name == Create.name else None
+
+        ops = [
+            {'action': 'create', 'name': rand_string()},
+            {'action': 'execute', 'id': job_id},
+            {'action': 'delete', 'id': job_id},
+        ]
+
+        service = self.get_service(ops, invoke)
+        service.handle()
+
+        results = service.response.payload.results
+
+        self.assertEqual(len(results), 3)
+        self.assertListEqual([result['idx'] for result in results], [0, 1, 2])
+        self.assertTrue(all(result['is_ok'] for result in results))
+
+        # Each operation was sent to its own service, without the action key ..
+        self.assertListEqual([elem[0] for elem in invoked], [Create.name, Execute.name, Delete.name])
+        self.assertNotIn('action', invoked[0][1])
+
+        # .. and each result contains what its own service returned.
+        self.assertDictEqual(results[0]['response'], {'id': job_id})
+        self.assertDictEqual(results[1]['response'], {})
+        self.assertDictEqual(results[2]['response'], {})
+
+# ################################################################################################################################
+
+    def test_unknown_action(self):
+
+        invoked = []
+
+        def invoke(service_name, request, skip_response_elem):
+            invoked.append(service_name)
+
+        action = rand_string()
+
+        ops = [
+            {'action': action},
+            {'action': 'execute', 'id': rand_string()},
+        ]
+
+        service = self.get_service(ops, invoke)
+        service.handle()
+
+        results = service.response.payload.results
+
+        # The unknown action was not sent anywhere but the next operation still ran
+        self.assertFalse(results[0]['is_ok'])
+        self.assertIn(action, results[0]['details'])
+        self.assertTrue(results[1]['is_ok'])
+        self.assertListEqual(invoked, [Execute.name])
+
+# ################################################################################################################################
+
+    def test_failing_op_does_not_stop_others(self):
+
+        def invoke(service_name, request, skip_response_elem):
+            if service_name == Edit.name:
+                raise Exception('Edit failed')
+            return {'id': request.get('id')}
+
+        ops = [
+            {'action': 'execute', 'id': rand_string()},
+            {'action': 'edit', 'id': rand_string()},
+            {'action': 'delete', 'id': rand_string()},
+        ]
+
+        service = self.get_service(ops, invoke)
+        service.handle()
+
+        results = service.response.payload.results
+
+        self.assertTrue(results[0]['is_ok'])
+        self.assertFalse(results[1]['is_ok'])
+        self.assertIn('Edit failed', results[1]['details'])
+        self.assertTrue(results[2]['is_ok'])
+
+# ################################################################################################################################
+
+    def test_input_from(self):
+
+        job_id = rand_string()
+        invoked = []
+
+        def invoke(service_name, request, skip_response_elem):
+            invoked.append((service_name, request))
+            if service_name == Create.name:
+                return {'id': job_id}
+
+        ops = [
+            {'action': 'create', 'name': rand_string()},
+            {'action': 'edit', 'name': rand_string(), 'input_from': 0},
+            {'action': 'execute', 'input_from': 2},
+        ]
+
+        service = self.get_service(ops, invoke)
+        service.handle()
+
+        results = service.response.payload.results
+
+        # The edit was given the ID of the job that was created before it ..
+        self.assertTrue(results[1]['is_ok'])
+        self.assertEqual(invoked[1][1]['id'], job_id)
+        self.assertNotIn('input_from', invoked[1][1])
+
+        # .. while an operation cannot take its input from itself.
+        self.assertFalse(results[2]['is_ok'])
+        self.assertEqual(len(invoked), 2)
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+if __name__ == '__main__':
+    main()
+
+# ################################################################################################################################
+# ################################################################################################################################
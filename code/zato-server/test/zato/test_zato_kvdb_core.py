@@ -7,12 +7,15 @@ Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
 """
 
 # stdlib
+import os
+from tempfile import TemporaryDirectory
 from unittest import main, TestCase
 
 # Zato
 from zato.common.test import rand_string
 from zato.server.connection.kvdb.api import ObjectCtx, ListRepo
 from zato.server.connection.kvdb.core import KVDB
+from zato.server.connection.kvdb.object_ import ObjectRepo
 
 # ################################################################################################################################
 # ################################################################################################################################
@@ -201,6 +204,62 @@ class ListRepoAPITestCase(TestCase):
         self.assertEqual(zato_kvdb.get_size(repo_name), 0)
 
 # ################################################################################################################################
+# ################################################################################################################################
+
+class SaveDataTestCase(TestCase):
+
+    def test_save_load_data(self):
+
+        with TemporaryDirectory() as dir_name:
+
+            data_path = os.path.join(dir_name, rand_string())
+            key = rand_string()
+            value = {rand_string(): rand_string()}
+
+            repo = ObjectRepo(rand_string(), data_path)
+            repo.in_ram_store[key] = value
+            repo.save_data()
+
+            # The temporary file was moved over the snapshot ..
+            self.assertListEqual(os.listdir(dir_name), [os.path.basename(data_path)])
+
+            # .. which contains all of the data.
+            repo2 = ObjectRepo(rand_string(), data_path)
+            repo2.load_data()
+
+            self.assertDictEqual(repo2.in_ram_store, {key: value})
+
+# ################################################################################################################################
+
+    def test_save_data_serialisation_error(self):
+
+        with TemporaryDirectory() as dir_name:
+
+            data_path = os.path.join(dir_name, rand_string())
+            key = rand_string()
+            value = {rand_string(): rand_string()}
+
+            repo = ObjectRepo(rand_string(), data_path)
+            repo.in_ram_store[key] = value
+            repo.save_data()
+
+            # Only string keys can be serialised
+            repo.in_ram_store[123] = rand_string()
+
+            with self.assertRaises(TypeError):
+                repo.save_data()
+
+            # No partial snapshot was left behind ..
+            self.assertListEqual(os.listdir(dir_name), [os.path.basename(data_path)])
+
+            # .. and the previous one is still intact.
+            repo2 = ObjectRepo(rand_string(), data_path)
+            repo2.load_data()
+
+            self.assertDictEqual(repo2.in_ram_store, {key: value})
+
+# ################################################################################################################################
+# ################################################################################################################################
 
 if __name__ == '__main__':
     main()
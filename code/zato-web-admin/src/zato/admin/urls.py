@@ -502,6 +502,8 @@ urlpatterns += [
         login_required(scheduler.Delete()), name=scheduler.Delete.url_name),
     url(r'^zato/scheduler/execute/(?P<job_id>.*)/cluster/(?P<cluster_id>.*)/$',
         login_required(scheduler.execute), name='scheduler-job-execute'),
+    url(r'^zato/scheduler/batch/cluster/(?P<cluster_id>.*)/$',
+        login_required(scheduler.batch), name='scheduler-job-batch'),
     url(r'^zato/scheduler/get-definition/(?P<start_date>.*)/(?P<repeat>.*)/'
         '(?P<weeks>.*)/(?P<days>.*)/(?P<hours>.*)/(?P<minutes>.*)/(?P<seconds>.*)/$',
         login_required(scheduler.get_definition), name='scheduler-job-get-definition'),
@@ -13,8 +13,10 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 # stdlib
 import logging
+from collections import namedtuple
 from datetime import datetime
-from io import StringIO
+from functools import lru_cache
+from operator import itemgetter
 from traceback import format_exc
 
 # ciso8601
@@ -24,6 +26,9 @@ from ciso8601 import parse_datetime
 from django.http import HttpResponse, HttpResponseServerError
 from django.template.response import TemplateResponse
 
+# orjson
+from orjson import dumps
+
 # pytz
 from pytz import UTC
 
@@ -34,9 +39,8 @@ from zato.admin.settings import job_type_friendly_names
 from zato.admin.web.forms.scheduler import CronStyleSchedulerJobForm, IntervalBasedSchedulerJobForm, OneTimeSchedulerJobForm
 from zato.common.api import SCHEDULER, TRACE1
 from zato.common.exception import ZatoException
-from zato.common.json_internal import dumps
+from zato.common.json_internal import loads
 from zato.common.odb.model import CronStyleJob, IntervalBasedJob, Job
-from zato.common.util.api import pprint
 
 # Python 2/3 compatibility
 from past.builtins import unicode
@@ -56,6 +60,50 @@ edit_one_time_prefix = 'edit-one_time'
 edit_interval_based_prefix = 'edit-interval_based'
 edit_cron_style_prefix = 'edit-cron_style'
 
+# Names of units that interval-based jobs are defined in, in the order they are displayed
+_interval_names = ('week', 'day', 'hour', 'minute', 'second')
+
+# Elements of zato.scheduler.job.get-list responses are dicts so each of these extracts
+# all the fields needed in a single call rather than through one attribute lookup per field.
+_get_job_fields = itemgetter('id', 'name', 'is_active', 'job_type', 'start_date', 'service_name', 'extra')
+_get_interval_fields = itemgetter('weeks', 'days', 'hours', 'minutes', 'seconds', 'repeats')
+
+# Job definitions depend only on these attributes of user profiles, which means that
+# they can be used, alongside the definitions' input, as keys to cache the definitions with.
+ProfileFormat = namedtuple('ProfileFormat', ['timezone', 'date_format_py', 'time_format_py'])
+
+# How many job definitions of each type to cache
+_definition_cache_size = 4096
+
+# Offsets and characters that separate parts of start dates in the layout that servers return
+_start_date_separators = ((4, '-'), (7, '-'), (10, 'T'), (13, ':'), (16, ':'))
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+def _parse_start_date(start_date):
+    """ Parses start dates in the exact 'YYYY-MM-DDTHH:MM:SS' layout that servers return by slicing fixed offsets,
+    which avoids a generic ISO-8601 parse and a subsequent .replace call. Any other layout is given to ciso8601.
+    """
+    if len(start_date) == 19 and all(start_date[idx] == separator for idx, separator in _start_date_separators):
+
+        parts = start_date[0:4], start_date[5:7], start_date[8:10], start_date[11:13], start_date[14:16], start_date[17:19]
+
+        # Only ASCII digits are accepted, the same as in the compiled version, because int() allows signs and whitespace too
+        if all(part.isascii() and part.isdigit() for part in parts):
+            try:
+                return datetime(*[int(part) for part in parts], tzinfo=UTC)
+            except ValueError:
+                pass
+
+    return parse_datetime(start_date).replace(tzinfo=UTC)
+
+# A compiled version of the parser is used if zato-cy has been built
+try:
+    from zato.cy.scheduler_ import parse_start_date
+except ImportError:
+    parse_start_date = _parse_start_date
+
 # ################################################################################################################################
 # ################################################################################################################################
 
@@ -64,14 +112,24 @@ def _get_start_date(start_date):
         return ''
 
     if not isinstance(start_date, datetime):
-        start_date = parse_datetime(start_date)
+        return parse_start_date(start_date)
 
     return start_date.replace(tzinfo=UTC)
 
 # ################################################################################################################################
 # ################################################################################################################################
 
+def _get_profile_format(user_profile):
+    return ProfileFormat(user_profile.timezone, user_profile.date_format_py, user_profile.time_format_py)
+
+# ################################################################################################################################
+# ################################################################################################################################
+
 def _one_time_job_def(user_profile, start_date):
+    return _one_time_job_def_cached(_get_profile_format(user_profile), start_date)
+
+@lru_cache(maxsize=_definition_cache_size)
+def _one_time_job_def_cached(user_profile, start_date):
     start_date = _get_start_date(start_date)
     return 'Execute once on {0} at {1}'.format(
         from_utc_to_user(start_date, user_profile, 'date'),
@@ -81,34 +139,36 @@ def _one_time_job_def(user_profile, start_date):
 # ################################################################################################################################
 
 def _interval_based_job_def(user_profile, start_date, repeats, weeks, days, hours, minutes, seconds):
+    return _interval_based_job_def_cached(
+        _get_profile_format(user_profile), start_date, repeats, weeks, days, hours, minutes, seconds)
+
+@lru_cache(maxsize=_definition_cache_size)
+def _interval_based_job_def_cached(user_profile, start_date, repeats, weeks, days, hours, minutes, seconds):
 
-    buf = StringIO()
+    parts = []
 
     if start_date:
-        buf.write('Start on {} at {}.'.format(
+        parts.append('Start on {} at {}.'.format(
             from_utc_to_user(start_date, user_profile, 'date'),
             from_utc_to_user(start_date, user_profile, 'time')))
 
     if not repeats:
-        buf.write(' Repeat indefinitely.')
+        parts.append(' Repeat indefinitely.')
     else:
         if repeats == 1:
-            buf.write(' Execute once.')
+            parts.append(' Execute once.')
         elif repeats == 2:
-            buf.write(' Repeat twice.')
+            parts.append(' Repeat twice.')
         # .. thrice or more
         elif repeats > 2:
-            buf.write(' Repeat ')
             if isinstance(repeats, int):
                 repeats = str(repeats)
             else:
                 repeats = repeats if isinstance(repeats, unicode) else repeats.decode('utf8')
-            buf.write(repeats)
-            buf.write(' times.')
+            parts.append(' Repeat {} times.'.format(repeats))
 
     interval = []
-    buf.write(' Interval: ')
-    for name, value in (('week',weeks), ('day',days), ('hour',hours), ('minute',minutes), ('second',seconds)):
+    for name, value in zip(_interval_names, (weeks, days, hours, minutes, seconds)):
         if value:
             try:
                 value = int(value)
@@ -118,10 +178,9 @@ def _interval_based_job_def(user_profile, start_date, repeats, weeks, days, hour
             else:
                 interval.append('{} {}{}'.format(value, name, 's' if value > 1 else ''))
 
-    buf.write(', '.join(interval))
-    buf.write('.')
+    parts.append(' Interval: {}.'.format(', '.join(interval)))
 
-    return buf.getvalue()
+    return ''.join(parts)
 
 # ################################################################################################################################
 # ################################################################################################################################
@@ -140,13 +199,10 @@ def _get_success_message(action, job_type, job_name):
 def _cron_style_job_def(user_profile, start_date, cron_definition):
     start_date = _get_start_date(start_date)
 
-    buf = StringIO()
-    buf.write('Start on {} at {}.'.format(
+    return 'Start on {} at {}.<br/>{}'.format(
         from_utc_to_user(start_date, user_profile, 'date'),
-        from_utc_to_user(start_date, user_profile, 'time')))
-    buf.write('<br/>{}'.format(cron_definition))
-
-    return buf.getvalue()
+        from_utc_to_user(start_date, user_profile, 'time'),
+        cron_definition)
 
 # ################################################################################################################################
 # ################################################################################################################################
@@ -243,16 +299,12 @@ def _create_interval_based(client, user_profile, cluster, params):
     if start_date:
         start_date = _get_start_date(start_date)
 
-    repeats = params.get('create-interval_based-repeats')
+    # The input message already contains all the values needed, there is no need to look them up in params again
+    repeats = input_dict['repeats']
     repeats = int(repeats) if repeats else None
 
-    weeks = params.get('create-interval_based-weeks')
-    days = params.get('create-interval_based-days')
-    hours = params.get('create-interval_based-hours')
-    minutes = params.get('create-interval_based-minutes')
-    seconds = params.get('create-interval_based-seconds')
-
-    definition = _interval_based_job_def(user_profile, start_date, repeats, weeks, days, hours, minutes, seconds)
+    definition = _interval_based_job_def(user_profile, start_date, repeats,
+        input_dict['weeks'], input_dict['days'], input_dict['hours'], input_dict['minutes'], input_dict['seconds'])
 
     return {'id': response.data.id, 'definition_text':definition}
 
@@ -308,16 +360,12 @@ def _edit_interval_based(client, user_profile, cluster, params):
     if start_date:
         start_date = _get_start_date(start_date)
 
-    repeats = params.get('edit-interval_based-repeats')
+    # The input message already contains all the values needed, there is no need to look them up in params again
+    repeats = input_dict['repeats']
     repeats = int(repeats) if repeats else None
 
-    weeks = params.get('edit-interval_based-weeks')
-    days = params.get('edit-interval_based-days')
-    hours = params.get('edit-interval_based-hours')
-    minutes = params.get('edit-interval_based-minutes')
-    seconds = params.get('edit-interval_based-seconds')
-
-    definition = _interval_based_job_def(user_profile, start_date, repeats, weeks, days, hours, minutes, seconds)
+    definition = _interval_based_job_def(user_profile, start_date, repeats,
+        input_dict['weeks'], input_dict['days'], input_dict['hours'], input_dict['minutes'], input_dict['seconds'])
 
     return {'definition_text':definition, 'id':params['edit-interval_based-id']}
 
@@ -346,6 +394,19 @@ def _edit_cron_style(client, user_profile, cluster, params):
 # ################################################################################################################################
 # ################################################################################################################################
 
+# Maps (action, job_type) pairs from POST requests to their handlers
+_handlers = {
+    ('create', SCHEDULER.JOB_TYPE.ONE_TIME): _create_one_time,
+    ('create', SCHEDULER.JOB_TYPE.INTERVAL_BASED): _create_interval_based,
+    ('create', SCHEDULER.JOB_TYPE.CRON_STYLE): _create_cron_style,
+    ('edit', SCHEDULER.JOB_TYPE.ONE_TIME): _edit_one_time,
+    ('edit', SCHEDULER.JOB_TYPE.INTERVAL_BASED): _edit_interval_based,
+    ('edit', SCHEDULER.JOB_TYPE.CRON_STYLE): _edit_cron_style,
+}
+
+# ################################################################################################################################
+# ################################################################################################################################
+
 @method_allowed('GET', 'POST')
 def index(req):
     try:
@@ -366,44 +427,45 @@ def index(req):
 
             data, meta = parse_response_data(req.zato.client.invoke('zato.scheduler.job.get-list', request))
 
+            # Local aliases used in each iteration below
+            user_profile = req.zato.user_profile
+            get_job_type_friendly = job_type_friendly_names.__getitem__
+            job_type_one_time = SCHEDULER.JOB_TYPE.ONE_TIME
+            job_type_interval_based = SCHEDULER.JOB_TYPE.INTERVAL_BASED
+            job_type_cron_style = SCHEDULER.JOB_TYPE.CRON_STYLE
+
             for job_elem in data:
 
-                id = job_elem.id
-                name = job_elem.name
-                is_active = job_elem.is_active
-                job_type = job_elem.job_type
-                start_date = job_elem.start_date
-                service_name = job_elem.service_name
-                extra = job_elem.extra
-                job_type_friendly = job_type_friendly_names[job_type]
+                id, name, is_active, job_type, start_date, service_name, extra = _get_job_fields(job_elem)
+                job_type_friendly = get_job_type_friendly(job_type)
 
                 job = Job(id, name, is_active, job_type,
-                          from_utc_to_user(start_date+'+00:00', req.zato.user_profile),
+                          from_utc_to_user(start_date+'+00:00', user_profile),
                           extra, service_name=service_name,
                           job_type_friendly=job_type_friendly)
 
-                if job_type == SCHEDULER.JOB_TYPE.ONE_TIME:
-                    definition_text=_one_time_job_def(req.zato.user_profile, start_date)
+                if job_type == job_type_one_time:
+                    definition_text=_one_time_job_def(user_profile, start_date)
+
+                elif job_type == job_type_interval_based:
+                    weeks, days, hours, minutes, seconds, repeats = _get_interval_fields(job_elem)
 
-                elif job_type == SCHEDULER.JOB_TYPE.INTERVAL_BASED:
-                    definition_text = _interval_based_job_def(req.zato.user_profile,
-                        _get_start_date(job_elem.start_date),
-                        job_elem.repeats, job_elem.weeks, job_elem.days,
-                        job_elem.hours, job_elem.minutes, job_elem.seconds)
+                    definition_text = _interval_based_job_def(user_profile,
+                        _get_start_date(start_date), repeats, weeks, days, hours, minutes, seconds)
 
-                    weeks = job_elem.weeks or ''
-                    days = job_elem.days or ''
-                    hours = job_elem.hours or ''
-                    minutes = job_elem.minutes or ''
-                    seconds = job_elem.seconds or ''
-                    repeats = job_elem.repeats or ''
+                    weeks = weeks or ''
+                    days = days or ''
+                    hours = hours or ''
+                    minutes = minutes or ''
+                    seconds = seconds or ''
+                    repeats = repeats or ''
 
                     ib_job = IntervalBasedJob(None, None, weeks, days, hours, minutes, seconds, repeats)
                     job.interval_based = ib_job
 
-                elif job_type == SCHEDULER.JOB_TYPE.CRON_STYLE:
-                    cron_definition = job_elem.cron_definition or ''
-                    definition_text=_cron_style_job_def(req.zato.user_profile, start_date, cron_definition)
+                elif job_type == job_type_cron_style:
+                    cron_definition = job_elem['cron_definition'] or ''
+                    definition_text=_cron_style_job_def(user_profile, start_date, cron_definition)
 
                     cs_job = CronStyleJob(None, None, cron_definition)
                     job.cron_style = cs_job
@@ -433,17 +495,12 @@ def index(req):
             job_name = req.POST['{0}-{1}-name'.format(action, job_type)]
 
             # Try to match the action and a job type with an action handler..
-            handler_name = '_' + action
-            if action != 'execute':
-                handler_name += '_' + job_type
-
-            handler = globals().get(handler_name)
+            handler = _handlers.get((action, job_type if action != 'execute' else None))
             if not handler:
-                msg = ('No handler found for action [{0}], job_type:[{1}], '
-                       'req.POST:[{2}], req.GET:[{3}].'.format(action, job_type,
-                          pprint(req.POST), pprint(req.GET)))
+                logger.error('No handler found for action `%s`, job_type:`%s`, req.POST:`%s`, req.GET:`%s`',
+                    action, job_type, req.POST, req.GET)
 
-                logger.error(msg)
+                msg = 'No handler found for action `{}`, job_type:`{}`'.format(action, job_type)
                 return HttpResponseServerError(msg)
 
             # .. invoke the action handler.
@@ -455,9 +512,8 @@ def index(req):
                     response = dumps(response)
                 return HttpResponse(response, content_type='application/javascript')
             except Exception:
-                msg = 'Could not invoke action `{}`, job_type:`{}`, e:`{}` req.POST:`{}`, req.GET:`{}'.format(
-                    action, job_type, format_exc(), req.POST, req.GET)
-                logger.error(msg)
+                msg = 'Could not invoke action `{}`, job_type:`{}`, e:`{}`'.format(action, job_type, format_exc())
+                logger.error('%s, req.POST:`%s`, req.GET:`%s`', msg, req.POST, req.GET)
                 return HttpResponseServerError(msg)
 
         template_name = 'zato/scheduler.html'
@@ -515,6 +571,38 @@ def execute(req, job_id, cluster_id):
 # ################################################################################################################################
 # ################################################################################################################################
 
+@method_allowed('POST')
+def batch(req, cluster_id):
+    """ Runs a list of create, edit, delete or execute operations on scheduler jobs in a single call to servers.
+    """
+    try:
+        ops = loads(req.body)['ops']
+        user_profile = req.zato.user_profile
+
+        for op in ops:
+            if op.get('action') in ('create', 'edit'):
+                op['cluster_id'] = cluster_id
+
+                # Same as with forms, start dates are given in the user's timezone
+                start_date = op.get('start_date')
+                if start_date:
+                    op['start_date'] = from_user_to_utc(start_date, user_profile).isoformat()
+
+        response = req.zato.client.invoke('zato.scheduler.job.batch', {'ops': ops})
+
+        if not response.ok:
+            raise Exception(response.details)
+
+    except Exception:
+        msg = 'Batch could not be executed, cluster_id:`{}`, e:`{}`'.format(cluster_id, format_exc())
+        logger.error(msg)
+        return HttpResponseServerError(msg)
+    else:
+        return HttpResponse(dumps({'results': response.data.results}), content_type='application/javascript')
+
+# ################################################################################################################################
+# ################################################################################################################################
+
 @method_allowed('POST')
 def get_definition(req, start_date, repeats, weeks, days, hours, minutes, seconds):
     start_date = _get_start_date(start_date)
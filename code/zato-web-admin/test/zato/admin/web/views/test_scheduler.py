@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+Copyright (C) 2021, Zato Source s.r.o. https://zato.io
+
+Licensed under LGPLv3, see LICENSE.txt for terms and conditions.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# stdlib
+import os
+from datetime import datetime
+from json import dumps, loads
+from unittest import TestCase
+
+# Django
+import django
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'zato.admin.settings'
+django.setup()
+
+# Bunch
+from bunch import Bunch
+
+# mock
+from mock import Mock, patch
+
+# pytz
+from pytz import UTC
+
+# Zato
+from zato.admin.web.models import UserProfile
+from zato.admin.web.views.scheduler import _parse_start_date, batch
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class ParseStartDateTestCase(TestCase):
+
+    def test_fixed_layout(self):
+
+        with patch('zato.admin.web.views.scheduler.parse_datetime') as parse_datetime:
+            start_date = _parse_start_date('2024-01-02T03:04:05')
+
+        self.assertEqual(start_date, datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC))
+        parse_datetime.assert_not_called()
+
+# ################################################################################################################################
+
+    def test_other_layouts(self):
+
+        # These are the same inputs that the compiled version does not parse by itself either
+        for value in ('2024/01/02T03:04:05', '2024-01-02T03-04-05', '+024-01-02T03:04:05', '2024- 1-02T03:04:05',
+            '2024-01-02T03:04:0\u0661', '2024-13-02T03:04:05', '2024-01-02 03:04:05'):
+
+            with patch('zato.admin.web.views.scheduler.parse_datetime') as parse_datetime:
+                _parse_start_date(value)
+
+            parse_datetime.assert_called_once_with(value)
+
+# ################################################################################################################################
+# ################################################################################################################################
+
+class BatchTestCase(TestCase):
+
+    def setUp(self):
+        self.cluster_id = '1'
+
+        self.user_profile = UserProfile()
+        self.user_profile.timezone = 'Europe/Berlin'
+        self.user_profile.time_format = '24'
+        self.user_profile.date_time_format_py = 'd-m-Y H:i:s'
+
+    def get_request(self, ops, response):
+        client = Mock()
+        client.invoke = Mock(return_value=response)
+
+        return Bunch(method='POST', body=dumps({'ops': ops}), zato=Bunch(user_profile=self.user_profile, client=client))
+
+# ################################################################################################################################
+
+    def test_batch_ok(self):
+
+        results = [{'idx': 0, 'is_ok': True}, {'idx': 1, 'is_ok': True}]
+
+        ops = [
+            {'action': 'create', 'name': 'job1', 'start_date': '01-03-2012 01:47:24'},
+            {'action': 'execute', 'id': '123'},
+        ]
+
+        req = self.get_request(ops, Bunch(ok=True, data=Bunch(results=results)))
+        response = batch(req, self.cluster_id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(loads(response.content)['results'], results)
+
+        service_name, request = req.zato.client.invoke.call_args[0]
+        create, execute = request['ops']
+
+        self.assertEqual(service_name, 'zato.scheduler.job.batch')
+
+        # Creates and edits are given the cluster and their start dates are converted from the user's timezone to UTC ..
+        self.assertEqual(create['cluster_id'], self.cluster_id)
+        self.assertEqual(create['start_date'], '2012-03-01T00:47:24')
+
+        # .. whereas other operations are sent as they are.
+        self.assertDictEqual(execute, {'action': 'execute', 'id': '123'})
+
+# ################################################################################################################################
+
+    def test_batch_invoke_not_ok(self):
+
+        req = self.get_request([{'action': 'execute', 'id': '123'}], Bunch(ok=False, details='Invocation error'))
+        response = batch(req, self.cluster_id)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('Invocation error', response.content.decode('utf8'))
+
+# ################################################################################################################################
+# ################################################################################################################################